@@ -0,0 +1,186 @@
+# ─────────────────────────────────────────────
+# 과거 전 구간 신호 백테스트 (날짜 × 종목 배열)
+#   - analyze_price가 마지막 봉에 하는 판정을 받아 둔 시세의 모든 봉에 그대로 적용한다
+#     (그 날까지의 봉만 쓴다: 일봉 지표는 원래 과거만 보고, 주봉은 진행 중인 주의 종가만 그 날 종가)
+#   - 신호별로 5/20/60거래일 뒤 수익률 평균과 적중률(매도 계열은 하락, 나머지는 상승)을 집계
+#   - 종목 묶음 단위로 연산 프로세스 풀에 나눠 실행하고 합계만 모은다
+#     (시세는 메모리 맵 패널로 한 번 써 두고 각 프로세스가 자기 묶음만 읽는다)
+# ─────────────────────────────────────────────
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import scanner
+from panel import MIN_DAILY_BARS, daily_panel
+from price_panel import open_panel, panel_frames, write_panel
+from indicators import cloud_np
+from signals import Cloud, Signal, cloud_code, cloud_codes, score_signals, signal_label
+from timeframes import BAR_COLUMNS, MIN_PERIOD_BARS, TAIL_ROWS, aggregate, period_keys, to_panel
+
+HORIZONS = (5, 20, 60)
+CHUNK_STOCKS = 200       # 프로세스 1개에 넘기는 종목 수
+SHORT_HISTORY_SHOWN = 10 # 요청보다 짧은 이력 종목을 로그에 보여 주는 개수
+BEARISH_SIGNALS = frozenset({Signal.FALL_ACCEL, Signal.STRONG_SELL, Signal.SELL_WATCH, Signal.DOWNTREND})
+_BEARISH = np.array([s in BEARISH_SIGNALS for s in Signal])
+_N_SIGNALS = len(Signal)
+
+def _clean(df):
+    return df.dropna(subset=list(BAR_COLUMNS[:3])).reset_index(drop=True)
+
+def _concat(frames, col):
+    return np.concatenate([f[col].to_numpy(dtype=np.float64) for f in frames])
+
+def _valid_lags(valid, k):
+    # 봉마다 그 봉까지의 유효 행 중 최근 k개 위치 (0 = 마지막 유효 행), 없으면 -1
+    rank = np.cumsum(valid, axis=0)
+    pos = np.full((valid.shape[0] + 1, valid.shape[1]), -1)
+    rows, cols = np.nonzero(valid)
+    pos[rank[rows, cols], cols] = rows
+    return np.stack([pos[np.maximum(rank - j, 0), np.arange(valid.shape[1])] for j in range(k)]), rank
+
+def _take(values, rows):
+    # rows: 행 위치 배열 (-1 = 없음) → 같은 모양의 값 (없으면 NaN)
+    cols = np.broadcast_to(np.arange(values.shape[1]), rows.shape)
+    return np.where(rows >= 0, values[np.maximum(rows, 0), cols], np.nan)
+
+def _weekly_history(frames, days, close):
+    # 봉마다 그 시점의 주봉 구름대 코드: 완료된 주 4개 + 진행 중인 주(종가 = 그 날 종가)
+    # 선행스팬은 26주 전까지의 봉으로 정해지므로 진행 중인 주의 고가/저가와 무관하다
+    (bars, w_counts), = aggregate(frames, ('W',)).values()
+    w_len = max(int(w_counts.max()), 1)
+    w_close = to_panel(bars['종가'], w_counts, w_len)
+    span_a, span_b = cloud_np(to_panel(bars['고가'], w_counts, w_len), to_panel(bars['저가'], w_counts, w_len))
+
+    present = ~np.isnan(days)
+    keys = np.where(present, period_keys(np.nan_to_num(days).astype(np.int64), 'W'), -1)
+    new_week = present.copy()
+    new_week[1:] &= keys[1:] != keys[:-1]
+    week_no = np.cumsum(new_week, axis=0) - 1          # 종목 안에서 몇 번째 주인지
+    row = w_len - w_counts + week_no                    # 주봉 패널의 행
+    rows = np.stack([np.where(present & (week_no >= j), row - j, -1) for j in range(TAIL_ROWS)])
+
+    w_rows = [close] + [_take(w_close, rows[j]) for j in range(1, TAIL_ROWS)]
+    a, b = _take(span_a, rows), _take(span_b, rows)
+    shape = close.shape
+    codes = cloud_codes(np.stack(w_rows).reshape(TAIL_ROWS, -1), a.reshape(TAIL_ROWS, -1),
+                        b.reshape(TAIL_ROWS, -1)).reshape(shape)
+    codes = np.where(np.isnan(a).any(axis=0) | np.isnan(b).any(axis=0), cloud_code(Cloud.NA), codes)
+    return np.where(week_no + 1 < MIN_PERIOD_BARS, cloud_code(Cloud.NO_DATA), codes)
+
+def _empty_stats(horizons=HORIZONS):
+    shape = (len(horizons), _N_SIGNALS)
+    return {'count': np.zeros(_N_SIGNALS, np.int64), 'n': np.zeros(shape, np.int64), 'sum': np.zeros(shape),
+            'hits': np.zeros(shape, np.int64), 'up': np.zeros(shape, np.int64)}
+
+def backtest_chunk(frames, horizons=HORIZONS):
+    # 종목 묶음 1개 → 신호별 합계 (건수, 기간별 표본 수 / 수익률 합 / 적중 수 / 상승 수)
+    stats = _empty_stats(horizons)
+    frames = [_clean(f) for f in frames if f is not None]
+    frames = [f for f in frames if len(f) >= MIN_DAILY_BARS]
+    if not frames:
+        return stats
+    counts = np.array([len(f) for f in frames], dtype=np.int64)
+    length = int(counts.max())
+    cols = {c: to_panel(_concat(frames, c), counts, length) for c in BAR_COLUMNS}
+    days = to_panel(np.concatenate([f['날짜'].to_numpy().astype('datetime64[D]').astype(np.int64)
+                                    for f in frames]).astype(np.float64), counts, length)
+
+    daily = daily_panel(cols['종가'], cols['고가'], cols['저가'], cols['거래량'])
+    valid = ~(np.isnan(daily['senkou_a']) | np.isnan(daily['senkou_b']) | np.isnan(daily['CCI']))
+    lags, n_valid = _valid_lags(valid, TAIL_ROWS)
+    d_rows = {f: [_take(daily[f], lags[j]) for j in range(TAIL_ROWS)] for f in ('종가', 'senkou_a', 'senkou_b')}
+    d_cloud = cloud_codes(*(np.stack(d_rows[f]).reshape(TAIL_ROWS, -1) for f in d_rows)).reshape(valid.shape)
+    w_cloud = _weekly_history(frames, days, cols['종가'])
+
+    # analyze_price와 같은 조건: 그 날까지 일봉 80개 이상, 유효 지표 봉 6개 이상
+    bar_no = np.arange(length)[:, None] - (length - counts)[None, :]
+    usable = (bar_no >= MIN_DAILY_BARS - 1) & (n_valid >= TAIL_ROWS + 1)
+    last, prev = lags[0][usable], lags[1][usable]
+    c = np.nonzero(usable)[1]
+    _, signal, _ = score_signals(d_cloud[usable], w_cloud[usable],
+                                 daily['MACD_hist'][last, c], daily['MACD_hist'][prev, c],
+                                 daily['CCI'][last, c], daily['CCI'][prev, c],
+                                 daily['종가'][last, c], daily['20MA'][last, c])
+    stats['count'] += np.bincount(signal, minlength=_N_SIGNALS)
+
+    close = cols['종가']
+    bearish = _BEARISH[signal]
+    for k, h in enumerate(horizons):
+        fwd = np.full(close.shape, np.nan)
+        fwd[:-h] = close[h:] / close[:-h] - 1
+        ret = fwd[usable]
+        ok = ~np.isnan(ret)
+        hit = np.where(bearish, ret < 0, ret > 0) & ok
+        stats['n'][k] += np.bincount(signal[ok], minlength=_N_SIGNALS)
+        stats['sum'][k] += np.bincount(signal[ok], weights=ret[ok], minlength=_N_SIGNALS)
+        stats['hits'][k] += np.bincount(signal[hit], minlength=_N_SIGNALS)
+        stats['up'][k] += np.bincount(signal[ok & (ret > 0)], minlength=_N_SIGNALS)
+    return stats
+
+def _merge(total, part):
+    for key in total:
+        total[key] += part[key]
+    return total
+
+def _panel_chunk(path, start, stop):
+    # 연산 프로세스: 공유 패널에서 자기 묶음만 읽어 집계
+    return backtest_chunk(panel_frames(open_panel(path), start, stop))
+
+def run_backtest(frames, workers=0, chunk=CHUNK_STOCKS):
+    # frames: 종목별 일봉 목록. workers > 0이면 종목 묶음을 프로세스 풀에 나눠 실행
+    bounds = [(i, min(i + chunk, len(frames))) for i in range(0, len(frames), chunk)]
+    total = _empty_stats()
+    with metrics.timer('backtest'):
+        if workers <= 0 or len(bounds) <= 1:
+            for start, stop in bounds:
+                _merge(total, backtest_chunk(frames[start:stop]))
+        else:
+            # 프레임을 묶음마다 pickle로 보내는 대신 패널 파일 경로와 범위만 넘긴다
+            os.makedirs(scanner.DATA_DIR, exist_ok=True)
+            with tempfile.TemporaryDirectory(prefix='backtest_panel_', dir=scanner.DATA_DIR) as path:
+                write_panel(path, range(len(frames)), frames)
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(_panel_chunk, path, start, stop) for start, stop in bounds]
+                    for f in futures:
+                        _merge(total, f.result())
+    return total
+
+def load_history(codes, price_source, max_pages, fetch_workers=4, log=None):
+    # 종목별 시세 (수집 실패 종목은 None). 스캔용 저장소는 최근 구간만 들고 있으므로
+    # 저장소를 거치지 않고 max_pages만큼 전부 새로 받는다
+    def _one(code):
+        daily, _ = scanner.load_price_frames(code, price_source, max_pages=max_pages, use_store=False)
+        return daily
+    codes = list(codes)
+    with ThreadPoolExecutor(max_workers=max(fetch_workers, 1)) as ex:
+        frames = list(ex.map(_one, codes))
+    want = max_pages * scanner.ROWS_PER_PRICE_PAGE
+    short = [(code, len(f)) for code, f in zip(codes, frames) if f is not None and 0 < len(f) < want]
+    if log and short:
+        # 상장 기간이 짧거나 수집이 중간에 끊긴 종목
+        shown = ", ".join(f"{code}({n}봉)" for code, n in short[:SHORT_HISTORY_SHOWN])
+        more = f" 외 {len(short) - SHORT_HISTORY_SHOWN}개" if len(short) > SHORT_HISTORY_SHOWN else ""
+        log(f"⚠️ 요청 {want}봉보다 짧은 이력 {len(short)}개 종목: {shown}{more}")
+    return frames
+
+def backtest_frame(stats, horizons=HORIZONS):
+    # 신호별 요약 표 (마지막 행 '전체' = 신호와 무관한 기준 수익률)
+    rows = []
+    def _row(label, count, n, total, hits):
+        row = {'신호': label, '건수': int(count)}
+        for k, h in enumerate(horizons):
+            row[f'{h}일 평균수익률(%)'] = total[k] / n[k] * 100 if n[k] else np.nan
+            row[f'{h}일 적중률(%)'] = hits[k] / n[k] * 100 if n[k] else np.nan
+        return row
+    for s in Signal:
+        if stats['count'][s]:
+            rows.append(_row(signal_label(s), stats['count'][s], stats['n'][:, s], stats['sum'][:, s],
+                             stats['hits'][:, s]))
+    # 기준 행의 적중률은 상승 비율
+    rows.append(_row('전체', stats['count'].sum(), stats['n'].sum(axis=1), stats['sum'].sum(axis=1),
+                     stats['up'].sum(axis=1)))
+    return pd.DataFrame(rows)
@@ -0,0 +1,76 @@
+# ─────────────────────────────────────────────
+# 보조지표 벤치마크: indicators(벡터화) vs pandas rolling / rolling().apply(lambda)
+#
+#   python benchmarks/bench_indicators.py [--lengths 600 5000] [--repeat 5]
+#
+# 각 항목의 최대 절대 오차도 함께 출력해 결과가 부동소수 허용 범위 안에서 같은지 확인한다.
+# ─────────────────────────────────────────────
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import indicators as ind
+
+def synth_ohlcv(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 50_000 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        '종가': close,
+        '고가': close * (1 + rng.uniform(0, 0.02, n)),
+        '저가': close * (1 - rng.uniform(0, 0.02, n)),
+        '거래량': rng.integers(10_000, 1_000_000, n).astype(float),
+    }, index=pd.bdate_range(end='2026-10-16', periods=n))
+
+def legacy_cci(df, period=20):
+    tp = (df['고가'] + df['저가'] + df['종가']) / 3
+    ma = tp.rolling(period).mean()
+    mad = tp.rolling(period).apply(lambda x: np.abs(x - x.mean()).mean(), raw=True)
+    return (tp - ma) / (0.015 * mad.replace(0, np.nan))
+
+def legacy_bollinger(series, period=20, std_mult=2):
+    ma = series.rolling(period).mean()
+    std = series.rolling(period).std()
+    return ma + std_mult * std, ma - std_mult * std, (4 * std_mult * std) / ma * 100
+
+def legacy_ichimoku(high, low):
+    return tuple((high.rolling(p).max() + low.rolling(p).min()) / 2 for p in (9, 26, 52))
+
+CASES = [
+    ('calc_cci',       lambda d: legacy_cci(d),                       lambda d: ind.calc_cci(d)),
+    ('calc_bollinger', lambda d: legacy_bollinger(d['종가'])[0],       lambda d: ind.calc_bollinger(d['종가'])[0]),
+    ('ichimoku_lines', lambda d: legacy_ichimoku(d['고가'], d['저가'])[2],
+                       lambda d: ind.ichimoku_lines(d['고가'], d['저가'])[2]),
+    ('rolling_mean60', lambda d: d['종가'].rolling(60).mean(),        lambda d: ind.rolling_mean(d['종가'], 60)),
+]
+
+def timed(fn, df, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--lengths', type=int, nargs='+', default=[600, 5000])
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'indicator':<16}{'bars':>7}{'legacy ms':>12}{'new ms':>10}{'speedup':>10}{'max |diff|':>13}")
+    for n in args.lengths:
+        df = synth_ohlcv(n)
+        for name, legacy, fast in CASES:
+            t_old, a = timed(legacy, df, args.repeat)
+            t_new, b = timed(fast, df, args.repeat)
+            diff = np.nanmax(np.abs(a.to_numpy() - b.to_numpy()))
+            print(f"{name:<16}{n:>7}{t_old * 1e3:>12.3f}{t_new * 1e3:>10.3f}"
+                  f"{t_old / t_new:>9.1f}x{diff:>13.2e}")
+
+if __name__ == '__main__':
+    main()
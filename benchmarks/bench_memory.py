@@ -0,0 +1,156 @@
+# ─────────────────────────────────────────────
+# 전 종목 스캔 메모리 벤치마크 (네트워크 없음, 고정 시드 합성 시세)
+#
+#   python benchmarks/bench_memory.py [--stocks 2500] [--bars 420] [--workers 4]
+#
+# 1) 시세 프레임 크기: 예전 표 파싱 결과 형태(문자열 날짜 + 전일비/시가 + float64)와 저장용 lean 형식
+# 2) analyze_batch 1회의 tracemalloc 최대 할당량: float64 프레임과 lean 프레임
+# 3) 백테스트 연산 프로세스별 최대 RSS / 종료 시 Pss·Private: 묶음을 pickle로 넘길 때와
+#    메모리 맵 패널(price_panel)을 열어 읽을 때. Pss·Private는 Linux(/proc)에서만 표시
+# 결과 대조: 두 경로의 analyze_batch 결과와 백테스트 합계가 같지 않으면 종료 코드 1.
+# ─────────────────────────────────────────────
+import argparse
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backtest
+from price_panel import write_panel
+from scanner import analyze_batch, lean_prices
+
+MB = 1024 * 1024
+
+def synth_universe(n_stocks, n_bars, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2026-10-16', periods=n_bars)
+    frames = []
+    for _ in range(n_stocks):
+        close = np.round(50_000 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars))))
+        frames.append(pd.DataFrame({
+            '날짜': dates,
+            '종가': close,
+            '고가': np.round(close * (1 + rng.uniform(0, 0.02, n_bars))),
+            '저가': np.round(close * (1 - rng.uniform(0, 0.02, n_bars))),
+            '거래량': rng.integers(10_000, 1_000_000, n_bars).astype(float),
+        }))
+    return frames
+
+def legacy_frame(df):
+    # 예전 read_html 결과: 문자열 날짜, 전일비(문자열)/시가 포함, 숫자는 float64
+    out = df.copy()
+    out.insert(2, '전일비', (df['종가'].diff().fillna(0).abs().astype(np.int64)).map('{:,}'.format))
+    out.insert(3, '시가', df['종가'].shift(1).fillna(df['종가']))
+    out['날짜'] = df['날짜'].dt.strftime('%Y.%m.%d')
+    return out
+
+def frame_mb(frames):
+    return sum(int(f.memory_usage(index=True, deep=True).sum()) for f in frames) / MB
+
+def _items(frames):
+    return [(f'{i:06d}', f'n{i}', 0.0, f, None, None) for i, f in enumerate(frames)]
+
+def batch_peak(frames):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows = analyze_batch(_items(frames))
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, peak / MB, elapsed
+
+def _proc_mem():
+    # (최대 RSS MB, Pss MB, Private MB) — /proc이 없으면 뒤 두 값은 None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    pss = private = None
+    try:
+        with open('/proc/self/smaps_rollup') as fp:
+            fields = dict(line.split(':', 1) for line in fp if ':' in line and not line.startswith(' '))
+        kb = lambda k: int(fields.get(k, '0 kB').split()[0])
+        pss = kb('Pss') / 1024
+        private = (kb('Private_Clean') + kb('Private_Dirty')) / 1024
+    except (OSError, ValueError):
+        pass
+    return os.getpid(), rss, pss, private
+
+def _pickled_chunk(frames):
+    return backtest.backtest_chunk(frames), _proc_mem()
+
+def _mapped_chunk(path, start, stop):
+    return backtest._panel_chunk(path, start, stop), _proc_mem()
+
+def run_workers(frames, workers, chunk, mapped):
+    bounds = [(i, min(i + chunk, len(frames))) for i in range(0, len(frames), chunk)]
+    total = backtest._empty_stats()
+    procs = {}
+    path = tempfile.mkdtemp(prefix='bench_panel_')
+    t0 = time.perf_counter()
+    try:
+        if mapped:
+            write_panel(path, range(len(frames)), frames)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if mapped:
+                futures = [pool.submit(_mapped_chunk, path, s, e) for s, e in bounds]
+            else:
+                futures = [pool.submit(_pickled_chunk, frames[s:e]) for s, e in bounds]
+            for f in futures:
+                stats, (pid, rss, pss, private) = f.result()
+                backtest._merge(total, stats)
+                procs[pid] = (max(rss, procs.get(pid, (0,))[0]), pss, private)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    return total, procs, time.perf_counter() - t0
+
+def _fmt(v):
+    return '-' if v is None else f'{v:8.1f}'
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="전 종목 스캔 메모리 벤치마크")
+    ap.add_argument('--stocks', type=int, default=2500)
+    ap.add_argument('--bars', type=int, default=420)
+    ap.add_argument('--workers', type=int, default=4)
+    ap.add_argument('--chunk', type=int, default=backtest.CHUNK_STOCKS)
+    args = ap.parse_args(argv)
+
+    frames = synth_universe(args.stocks, args.bars)
+    lean = [lean_prices(f) for f in frames]
+    legacy = [legacy_frame(f) for f in frames]
+    print(f"stocks={args.stocks}  bars={args.bars}")
+    print(f"[frames]   legacy {frame_mb(legacy):8.1f} MB   float64 {frame_mb(frames):8.1f} MB   "
+          f"lean {frame_mb(lean):8.1f} MB")
+    del legacy
+
+    ok = True
+    rows64, peak64, t64 = batch_peak(frames)
+    rows32, peak32, t32 = batch_peak(lean)
+    same = len(rows64) == len(rows32) and all(
+        a[:5] == b[:5] and all(x == y or (x != x and y != y) for x, y in zip(a[5:], b[5:]))
+        for a, b in zip(rows64, rows32))
+    ok &= same
+    print(f"[analyze]  float64 peak {peak64:8.1f} MB ({t64:.2f}s)   lean peak {peak32:8.1f} MB ({t32:.2f}s)   "
+          f"results {'equal' if same else 'DIFFER'}")
+
+    results = {}
+    for label, mapped in (('pickled', False), ('memmap', True)):
+        total, procs, elapsed = run_workers(lean, args.workers, args.chunk, mapped)
+        results[label] = total
+        print(f"[backtest] {label:8s} {elapsed:6.2f}s  workers={len(procs)}")
+        for pid, (rss, pss, private) in sorted(procs.items()):
+            print(f"           pid {pid:>7}  max RSS {_fmt(rss)} MB  Pss {_fmt(pss)} MB  Private {_fmt(private)} MB")
+    same = all(np.allclose(results['pickled'][k], results['memmap'][k]) for k in results['pickled'])
+    ok &= same
+    print(f"[backtest] stats {'equal' if same else 'DIFFER'}")
+    parent = _proc_mem()
+    print(f"[parent]   max RSS {_fmt(parent[1])} MB")
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
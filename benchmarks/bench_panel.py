@@ -0,0 +1,134 @@
+# ─────────────────────────────────────────────
+# 배치 지표 엔진(panel) 벤치마크 + 종목별 경로 대조
+#
+#   python benchmarks/bench_panel.py [--stocks 500] [--repeat 3] [--inc-stocks 100]
+#
+# panel.compute_universe가 만든 최근 5개 일봉과 일/주/월 구름대 코드가 indicators의 종목별
+# 프레임(pandas resample + add_cloud)과 같은지 확인하고, 다르면 종료 코드 1.
+# 주/월봉 집계와 구름대 판정 경로(timeframes)도 함께 대조한다.
+# 증분 경로(IndicatorState)도 전체 재계산과 대조한다. 합성 종목 일부에는 거래정지처럼
+# 거래량 0인 봉을 넣는다 (거래량 평균 0 → vol_ratio inf / NaN).
+# ─────────────────────────────────────────────
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicator_state import IndicatorState
+from indicators import add_cloud, daily_indicator_frame
+from panel import DAILY_FIELDS, MIN_DAILY_BARS, compute_universe
+from signals import Cloud, cloud_code, cloud_state
+from timeframes import MIN_PERIOD_BARS, TAIL_ROWS
+
+RESAMPLE_RULES = {'W': 'W', 'M': 'ME'}
+
+# ─── 대조 기준: pandas resample 기반 종목 1개 주/월봉 (라이브러리는 timeframes.aggregate) ───
+def resample_bars(df_price, rule):
+    # 일봉 → 주봉('W') / 월봉('ME')
+    return df_price.resample(rule, on='날짜').agg({
+        '종가': 'last',
+        '고가': 'max',
+        '저가': 'min',
+        '거래량': 'sum'
+    }).dropna()
+
+def period_indicator_frame(df_bars):
+    return add_cloud(df_bars.astype(np.float64)).dropna(subset=['senkou_a', 'senkou_b'])
+
+def synth_universe(n_stocks, lengths=(70, 150, 300, 420, 600, 1800), seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_stocks):
+        n = lengths[i % len(lengths)]
+        close = np.round(50_000 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+        frames.append(pd.DataFrame({
+            '날짜': pd.bdate_range(end='2026-10-16', periods=n),
+            '종가': close,
+            '고가': np.round(close * (1 + rng.uniform(0, 0.02, n))),
+            '저가': np.round(close * (1 - rng.uniform(0, 0.02, n))),
+            '거래량': rng.integers(10_000, 1_000_000, n).astype(float),
+        }))
+        if i % 7 == 3:
+            # 거래정지 후 재개: 마지막 봉만 거래량이 있다
+            frames[-1].loc[frames[-1].index[-25:-1], '거래량'] = 0.0
+        elif i % 7 == 5:
+            # 거래정지 중
+            frames[-1].loc[frames[-1].index[-25:], '거래량'] = 0.0
+    return frames
+
+def _period_cloud(df, rule):
+    bars = resample_bars(df, rule)
+    if len(bars) < MIN_PERIOD_BARS:
+        return cloud_code(Cloud.NO_DATA)
+    wf = period_indicator_frame(bars)
+    if len(wf) < TAIL_ROWS:
+        return cloud_code(Cloud.NA)
+    return cloud_state([wf.iloc[-k] for k in range(1, TAIL_ROWS + 1)])
+
+def per_stock(frames):
+    out = []
+    for df in frames:
+        tail = {'daily': None, 'clouds': None}
+        if len(df) >= MIN_DAILY_BARS:
+            d = daily_indicator_frame(df)
+            tail['clouds'] = {tf: _period_cloud(df, rule) for tf, rule in RESAMPLE_RULES.items()}
+            if len(d) >= TAIL_ROWS:
+                tail['clouds']['D'] = cloud_state([d.iloc[-k] for k in range(1, TAIL_ROWS + 1)])
+            if len(d) >= TAIL_ROWS + 1:
+                tail['daily'] = [d.iloc[-k] for k in range(1, TAIL_ROWS + 1)]
+        out.append(tail)
+    return out
+
+def incremental(frames):
+    return [IndicatorState.from_frame(df).tail() for df in frames]
+
+def compare(ref, got):
+    bad = 0
+    for i, (a, b) in enumerate(zip(ref, got)):
+        if (a['daily'] is None) != (b['daily'] is None):
+            bad += 1
+            print(f"  #{i} daily: 존재 여부 불일치")
+        elif a['daily'] is not None:
+            x = np.array([[r[f] for f in DAILY_FIELDS] for r in a['daily']], dtype=float)
+            y = np.array([[r[f] for f in DAILY_FIELDS] for r in b['daily']], dtype=float)
+            if not np.allclose(x, y, rtol=1e-9, atol=1e-9, equal_nan=True):
+                bad += 1
+                print(f"  #{i} daily: 최대 오차 {np.nanmax(np.abs(x - y)):.3e}")
+        for tf in (a['clouds'] or {}):
+            if a['clouds'][tf] != (b['clouds'] or {}).get(tf):
+                bad += 1
+                print(f"  #{i} {tf} 구름대: {a['clouds'][tf]} != {(b['clouds'] or {}).get(tf)}")
+    return bad
+
+def _timed(fn, frames):
+    t0 = time.perf_counter()
+    fn(frames)
+    return time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--stocks', type=int, default=500)
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--inc-stocks', type=int, default=100, help="증분 경로와 대조할 종목 수 (봉 단위 계산이라 느림)")
+    args = ap.parse_args()
+
+    frames = synth_universe(args.stocks)
+    t_ref = min(_timed(per_stock, frames) for _ in range(args.repeat))
+    t_new = min(_timed(compute_universe, frames) for _ in range(args.repeat))
+    panel = compute_universe(frames)
+    bad = compare(per_stock(frames), panel)
+    print(f"stocks={args.stocks}  per-stock {t_ref * 1e3:.1f} ms  panel {t_new * 1e3:.1f} ms  "
+          f"speedup {t_ref / t_new:.1f}x  mismatches {bad}")
+
+    # 증분 경로는 analyze_incremental과 같이 일봉 80개 이상인 종목만
+    idx = [i for i, df in enumerate(frames) if len(df) >= MIN_DAILY_BARS][:args.inc_stocks]
+    inc_bad = compare([panel[i] for i in idx], incremental([frames[i] for i in idx]))
+    print(f"incremental stocks={len(idx)}  mismatches {inc_bad}")
+    sys.exit(1 if bad or inc_bad else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# ─────────────────────────────────────────────
+# 페이지 파서 마이크로 벤치마크: naver_tables(lxml) vs 기존 경로(pd.read_html / BeautifulSoup)
+#
+#   python benchmarks/bench_parse.py                  # 합성 픽스처 사용
+#   python benchmarks/bench_parse.py --fixtures DIR   # 저장된 HTML 사용
+#
+# DIR 안의 파일명은 sise_day*.html / sise_market_sum*.html / sise_foreign_hold*.html
+# 형식이어야 하며, 네이버 원본 그대로(euc-kr bytes) 저장된 것을 가정한다.
+# ─────────────────────────────────────────────
+import argparse
+import glob
+import io
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from naver_tables import extract_price_table, extract_market_sum, extract_foreign_ratios
+
+# ─── 기존 경로 (baseline) ───
+def legacy_price_table(raw):
+    df = pd.read_html(io.StringIO(raw.decode('euc-kr', errors='replace')))[0]
+    df = df.dropna(how='all').rename(columns=lambda x: x.strip())
+    for col in ['종가', '고가', '저가', '거래량']:
+        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce')
+    df['날짜'] = pd.to_datetime(df['날짜'], errors='coerce')
+    return df.dropna(subset=['날짜', '종가'])
+
+def legacy_market_sum(raw):
+    soup = BeautifulSoup(raw.decode('euc-kr', errors='replace'), 'html.parser')
+    out = []
+    for tr in soup.select_one('table.type_2').select('tr'):
+        tds = tr.find_all('td')
+        a = tr.find('a', href=True)
+        if len(tds) >= 5 and a:
+            m = re.search(r'code=(\d{6})', a['href'])
+            if m:
+                out.append((m.group(1), a.get_text(strip=True), tds[4].get_text(strip=True)))
+    return out
+
+def legacy_foreign(raw):
+    soup = BeautifulSoup(raw.decode('euc-kr', errors='replace'), 'html.parser')
+    out = {}
+    for tr in soup.select_one('table.type_2').select('tr'):
+        tds = tr.find_all('td')
+        a = tr.find('a', href=True)
+        if len(tds) >= 8 and a:
+            m = re.search(r'code=(\d{6})', a['href'])
+            if m:
+                try:
+                    out[m.group(1)] = float(tds[7].get_text(strip=True).replace('%', '').replace(',', ''))
+                except ValueError:
+                    pass
+    return out
+
+# ─── 합성 픽스처 (네이버 표 마크업 모사) ───
+_HEAD = ('<html><head><meta http-equiv="Content-Type" content="text/html; charset=euc-kr">'
+         '</head><body>')
+_NAVI = ('<table class="Nnavi"><tr><td class="on"><a href="?page=1">1</a></td>'
+         '<td class="pgRR"><a href="?page=60">맨뒤</a></td></tr></table></body></html>')
+
+def synth_sise_day(rng):
+    dates = pd.bdate_range(end='2026-10-16', periods=10)[::-1]
+    rows = []
+    for d in dates:
+        c = int(rng.integers(10_000, 90_000))
+        rows.append(
+            f'<tr onmouseover="mouseOver(this)"><td align="center"><span class="tah p10 gray03">{d:%Y.%m.%d}</span></td>'
+            f'<td class="num"><span class="tah p11">{c:,}</span></td>'
+            f'<td class="num"><img src="ico_up.gif" alt="상승"><span class="tah p11 red02">\n\t\t\t\t100\n\t\t\t\t</span></td>'
+            f'<td class="num"><span class="tah p11">{c:,}</span></td>'
+            f'<td class="num"><span class="tah p11">{c + 500:,}</span></td>'
+            f'<td class="num"><span class="tah p11">{c - 500:,}</span></td>'
+            f'<td class="num"><span class="tah p11">{int(rng.integers(1e4, 1e7)):,}</span></td></tr>'
+            '<tr><td colspan="7" height="1" bgcolor="#e6e6e6"></td></tr>')
+    html = (_HEAD + '<table cellspacing="0" class="type2"><tr><th>날짜</th><th>종가</th><th>전일비</th>'
+            '<th>시가</th><th>고가</th><th>저가</th><th>거래량</th></tr>' + ''.join(rows) + '</table>' + _NAVI)
+    return html.encode('euc-kr')
+
+def synth_code_table(rng, n_cells):
+    rows = []
+    for i in range(50):
+        code = f"{int(rng.integers(0, 999999)):06d}"
+        cells = [f'<td class="no">{i + 1}</td>',
+                 f'<td><a href="/item/main.naver?code={code}" class="tltle">종목{i}</a></td>']
+        cells += [f'<td class="number">{int(rng.integers(1000, 90000)):,}</td>' for _ in range(n_cells - 2)]
+        cells[4] = f'<td class="number"><span class="tah p11 red01">\n+{rng.uniform(0, 5):.2f}%\n</span></td>'
+        if n_cells > 7:
+            cells[7] = f'<td class="number">{rng.uniform(0, 60):.2f}%</td>'
+        rows.append('<tr onmouseover="mouseOver(this)">' + ''.join(cells) + '</tr>')
+    html = (_HEAD + '<table class="type_2" cellspacing="0"><thead><tr><th>N</th><th>종목명</th></tr></thead><tbody>'
+            + ''.join(rows) + '</tbody></table>' + _NAVI)
+    return html.encode('euc-kr')
+
+def load_fixtures(path, n):
+    rng = np.random.default_rng(0)
+    if path:
+        found = {}
+        for kind in ('sise_day', 'sise_market_sum', 'sise_foreign_hold'):
+            files = sorted(glob.glob(os.path.join(path, f'{kind}*.html')))
+            found[kind] = [open(f, 'rb').read() for f in files]
+        return found
+    return {
+        'sise_day': [synth_sise_day(rng) for _ in range(n)],
+        'sise_market_sum': [synth_code_table(rng, 12) for _ in range(max(1, n // 10))],
+        'sise_foreign_hold': [synth_code_table(rng, 9) for _ in range(max(1, n // 10))],
+    }
+
+def bench(fn, pages, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for raw in pages:
+            fn(raw)
+        best = min(best, time.perf_counter() - t0)
+    return best / max(len(pages), 1)
+
+CASES = [
+    ('sise_day', legacy_price_table, extract_price_table),
+    ('sise_market_sum', legacy_market_sum, extract_market_sum),
+    ('sise_foreign_hold', legacy_foreign, extract_foreign_ratios),
+]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--fixtures', help='저장된 HTML 픽스처 디렉터리')
+    ap.add_argument('--pages', type=int, default=200, help='합성 픽스처 페이지 수')
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    fixtures = load_fixtures(args.fixtures, args.pages)
+    print(f"{'page':<20}{'pages':>7}{'legacy ms':>12}{'lxml ms':>10}{'speedup':>10}")
+    for kind, legacy, fast in CASES:
+        pages = fixtures.get(kind) or []
+        if not pages:
+            continue
+        t_old = bench(legacy, pages, args.repeat)
+        t_new = bench(fast, pages, args.repeat)
+        print(f"{kind:<20}{len(pages):>7}{t_old * 1e3:>12.3f}{t_new * 1e3:>10.3f}{t_old / t_new:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+# ─────────────────────────────────────────────
+# 스캔 코어 오프라인 벤치마크 (네트워크 없음, 고정 시드 합성 OHLCV)
+#
+#   python benchmarks/bench_suite.py                                   # 전체 실행
+#   python benchmarks/bench_suite.py --quick                           # 짧은 길이/작은 유니버스만
+#   python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+#   python benchmarks/bench_suite.py --baseline benchmarks/baseline.json [--tolerance 0.25]
+#
+# 항목별로 1회 소요 시간(예열 후 반복 측정의 중앙값), 처리량(호출/초, 봉/초), tracemalloc 최대 할당량을 출력한다.
+# --baseline을 주면 같은 항목의 기준값보다 시간 또는 메모리가 허용 비율 이상 늘어난 경우
+# REGRESSION으로 표시하고 종료 코드 1. 시간은 중앙값이 허용 비율을 넘고 이번 측정의 최솟값도
+# 기준 측정의 최댓값보다 느릴 때만(측정 분포가 겹치지 않을 때) 저하로 보며, 양쪽 모두 측정이
+# MIN_SAMPLES회 이상일 때만 판정한다. 저하로 보인 항목은 한 번 더 측정해 그때도 느려야 보고한다.
+# 측정 1회마다 앞뒤로 고정 보정 작업을 재서 그 평균으로 나눈 값끼리 비교하므로, 공유 vCPU처럼
+# 기계 전체 속도가 실행 중에 오르내려도 판정이 흔들리지 않는다.
+# 기준값은 측정한 기계에서만 의미가 있다.
+# ─────────────────────────────────────────────
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import indicators as ind
+from scanner import analyze_batch, analyze_price, calc_signal_score
+from signals import CLOUD_SHIFT, Cloud, cloud_code, cloud_state, score_signals
+from timeframes import frame_clouds
+from bench_panel import period_indicator_frame, resample_bars
+
+LENGTHS = (120, 420, 1200, 5000)
+UNIVERSES = (50, 500, 2000)
+UNIVERSE_BARS = 420
+MIN_SAMPLES = 3          # 분포 겹침 판정에 필요한 최소 측정 횟수
+CALIB_RUNS = 3           # 보정 작업 1회 값 = 이만큼 돌린 최솟값
+
+def synth_ohlcv(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = np.round(50_000 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+    return pd.DataFrame({
+        '날짜': pd.bdate_range(end='2026-10-16', periods=n),
+        '종가': close,
+        '고가': np.round(close * (1 + rng.uniform(0, 0.02, n))),
+        '저가': np.round(close * (1 - rng.uniform(0, 0.02, n))),
+        '거래량': rng.integers(10_000, 1_000_000, n).astype(float),
+    })
+
+def _ichimoku(df):
+    return ind.add_cloud(df.set_index('날짜')[['종가', '고가', '저가']].copy())
+
+def _weekly(df):
+    # pandas resample 대조 기준 (라이브러리 경로는 'timeframes' 항목)
+    return period_indicator_frame(resample_bars(df, 'W'))
+
+def _score_inputs(df):
+    d = ind.daily_indicator_frame(df)
+    rows = [d.iloc[-k] for k in range(1, 6)]
+    return rows[0], rows[1], cloud_state(rows)
+
+def _score_arrays(size, seed=0):
+    # 유니버스 전체 점수 계산용 종목별 입력 배열 (구름대 코드 + 최근 2봉 수치)
+    rng = np.random.default_rng(seed)
+    states = rng.integers(Cloud.INSIDE, len(Cloud), (2, size))
+    return (states[0] << CLOUD_SHIFT | rng.integers(0, 5, size), states[1] << CLOUD_SHIFT,
+            rng.normal(0, 1, size), rng.normal(0, 1, size), rng.normal(0, 120, size), rng.normal(0, 120, size),
+            rng.uniform(80, 130, size), np.full(size, 100.0))
+
+def stock_cases(n):
+    # (이름, 준비 함수, 측정 함수): 준비 결과를 측정 함수에 넘긴다 (준비 시간은 제외)
+    return [
+        ('calc_bollinger', lambda: synth_ohlcv(n)['종가'], lambda s: ind.calc_bollinger(s)),
+        ('calc_cci',       lambda: synth_ohlcv(n),          lambda d: ind.calc_cci(d)),
+        ('get_ma5_slope',  lambda: synth_ohlcv(n)['종가'], lambda s: ind.get_ma5_slope(s)),
+        ('ichimoku',       lambda: synth_ohlcv(n),          _ichimoku),
+        ('weekly',         lambda: synth_ohlcv(n),          _weekly),
+        ('timeframes',     lambda: [synth_ohlcv(n)],        frame_clouds),
+        ('calc_signal_score', lambda: _score_inputs(synth_ohlcv(n)),
+         lambda a: calc_signal_score(a[0], a[1], a[2], cloud_code(Cloud.ABOVE))),
+        ('analyze_price',  lambda: synth_ohlcv(n),
+         lambda d: analyze_price('000000', 'bench', 0.0, d)),
+    ]
+
+def _universe(size):
+    return [synth_ohlcv(UNIVERSE_BARS, seed=i) for i in range(size)]
+
+def universe_cases(size):
+    return [
+        ('score_signals',  lambda: _score_arrays(size), lambda a: score_signals(*a)),
+        ('timeframes',     lambda: _universe(size),     frame_clouds),
+        ('scan_per_stock', lambda: _universe(size),
+         lambda frames: [analyze_price(f"{i:06d}", 'bench', 0.0, f) for i, f in enumerate(frames)]),
+        ('scan_panel',     lambda: _universe(size),
+         lambda frames: analyze_batch((f"{i:06d}", 'bench', 0.0, f, None, None)
+                                      for i, f in enumerate(frames))),
+    ]
+
+def _calibration_work(_):
+    # 파이썬 루프 + NumPy 정렬이 섞인 고정 작업 (측정 대상 코드와 무관)
+    total = 0
+    for i in range(50_000):
+        total += i
+    np.sort(np.random.default_rng(0).random(50_000))
+    return total
+
+def calibrate():
+    # 보정 작업 1회 시간 (몇 ms라 중간에 끼어든 다른 작업에 흔들리지 않게 최솟값)
+    best = float('inf')
+    for _ in range(CALIB_RUNS):
+        t0 = time.perf_counter()
+        _calibration_work(None)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def measure(fn, arg, repeat, min_time, memory=True):
+    # 1회 예열 후 repeat회 측정한 값의 중앙값 (너무 짧은 항목은 min_time을 채울 때까지 반복해 평균)
+    # 최솟값 하나는 실행마다 흔들려 기준값 비교가 오락가락하므로 중앙값을 쓴다
+    # 측정 중에는 timeit처럼 GC를 끈다 (수거 시점에 따라 1회 값이 크게 튄다)
+    # norm*: 측정 1회를 그 앞뒤 보정 작업 시간의 평균으로 나눈 값 (기계 속도 변화를 1회 단위로 상쇄)
+    fn(arg)
+    samples, calibs = [], [calibrate()]
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            loops, t0 = 0, time.perf_counter()
+            while True:
+                fn(arg)
+                loops += 1
+                elapsed = time.perf_counter() - t0
+                if elapsed >= min_time:
+                    break
+        finally:
+            gc.enable()
+        samples.append(elapsed / loops)
+        calibs.append(calibrate())
+    norm = [t / ((a + b) / 2) for t, a, b in zip(samples, calibs, calibs[1:])]
+    peak = 0
+    if memory:
+        # 측정 루프가 남긴 순환 참조 쓰레기를 먼저 치워 수거 시점에 따라 최대 할당량이 흔들리지 않게 한다
+        gc.collect()
+        tracemalloc.start()
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {'sec': statistics.median(samples), 'min': min(samples), 'max': max(samples),
+            'calib': statistics.median(calibs), 'norm': statistics.median(norm),
+            'norm_min': min(norm), 'norm_max': max(norm), 'samples': len(samples), 'peak_bytes': peak}
+
+def _plan(args):
+    plan = []
+    for n in args.lengths:
+        plan += [(f"{name}[bars={n}]", n, prep, fn, False) for name, prep, fn in stock_cases(n)]
+    for size in args.universe:
+        plan += [(f"{name}[stocks={size}]", size * UNIVERSE_BARS, prep, fn, True)
+                 for name, prep, fn in universe_cases(size)]
+    if args.filter:
+        plan = [p for p in plan if args.filter in p[0]]
+    return plan
+
+def _measure_case(args, bars, prep, fn, big):
+    # 유니버스 항목은 1회가 길어 측정 횟수만 줄인다 (1회가 min_time보다 짧은 score_signals 등은 그대로 반복)
+    arg = prep()
+    res = measure(fn, arg, args.universe_repeat if big else args.repeat, args.min_time)
+    return dict(res, bars=bars)
+
+def run(args):
+    results, cases = {}, {}
+    print(f"{'case':<34}{'ms/call':>11}{'calls/s':>11}{'Mbars/s':>10}{'peak KiB':>11}")
+    for key, *case in _plan(args):
+        cases[key] = case
+        results[key] = res = _measure_case(args, *case)
+        sec, peak, bars = res['sec'], res['peak_bytes'], res['bars']
+        print(f"{key:<34}{sec * 1e3:>11.3f}{1 / sec:>11.1f}{bars / sec / 1e6:>10.2f}{peak / 1024:>11.0f}")
+    return results, cases
+
+def _time_check(cur, ref, tolerance):
+    # (기준 대비 시간 비율, 저하 여부). 예전 기준 파일(1회 보정값 norm 없음)은 항목 보정값 비율로 환산
+    if 'norm' in ref:
+        ratio = cur['norm'] / ref['norm']
+        lo, hi = cur['norm_min'], ref['norm_max']
+    else:
+        speed = cur['calib'] / ref['calib'] if ref.get('calib') else 1.0
+        ratio = cur['sec'] / (ref['sec'] * speed)
+        lo, hi = cur['min'], ref.get('max', ref['sec']) * speed
+    enough = min(cur['samples'], ref.get('samples', 0)) >= MIN_SAMPLES
+    return ratio, enough and ratio > 1 + tolerance and lo > hi
+
+def compare(results, baseline, tolerance, mem_tolerance, remeasure=None):
+    # remeasure(key): 저하로 보인 항목을 다시 측정한 결과 (두 번 다 느려야 저하로 보고)
+    regressions = 0
+    print(f"\n{'case':<34}{'time x':>9}{'mem x':>9}")
+    for key, cur in results.items():
+        ref = baseline['results'].get(key)
+        if ref is None:
+            print(f"{key:<34}{'new':>9}")
+            continue
+        t_ratio, slower = _time_check(cur, ref, tolerance)
+        note = ""
+        if slower and remeasure is not None:
+            first = t_ratio
+            cur = results[key] = remeasure(key)
+            t_ratio, slower = _time_check(cur, ref, tolerance)
+            note = f"   (재측정, 처음 {first:.2f})"
+        m_ratio = cur['peak_bytes'] / ref['peak_bytes'] if ref['peak_bytes'] else 1.0
+        bad = slower or m_ratio > 1 + mem_tolerance
+        regressions += bad
+        print(f"{key:<34}{t_ratio:>9.2f}{m_ratio:>9.2f}" + ("   REGRESSION" if bad else "") + note)
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--lengths', type=int, nargs='+', default=list(LENGTHS))
+    ap.add_argument('--universe', type=int, nargs='+', default=list(UNIVERSES))
+    ap.add_argument('--quick', action='store_true', help="길이 420 / 유니버스 50만 실행")
+    ap.add_argument('--filter', help="이름에 이 문자열이 들어간 항목만")
+    ap.add_argument('--repeat', type=int, default=7)
+    ap.add_argument('--universe-repeat', type=int, default=5)
+    ap.add_argument('--min-time', type=float, default=0.05, help="반복 1회의 최소 측정 시간(초)")
+    ap.add_argument('--baseline', help="비교할 기준 JSON")
+    ap.add_argument('--save-baseline', help="이번 결과를 기준 JSON으로 저장")
+    ap.add_argument('--tolerance', type=float, default=0.25, help="허용 시간 증가 비율")
+    ap.add_argument('--mem-tolerance', type=float, default=0.10, help="허용 메모리 증가 비율")
+    args = ap.parse_args()
+    if args.quick:
+        args.lengths, args.universe = [420], [50]
+
+    results, cases = run(args)
+    if args.save_baseline:
+        meta = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                'machine': platform.machine(), 'processor': platform.processor(), 'saved_at': time.time()}
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"\n기준값 저장: {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.mem_tolerance,
+                              remeasure=lambda key: _measure_case(args, *cases[key]))
+        if regressions:
+            print(f"\n❌ 성능 저하 {regressions}건 (기준: {args.baseline})")
+            sys.exit(1)
+        print("\n✅ 기준 대비 성능 저하 없음")
+
+if __name__ == '__main__':
+    main()
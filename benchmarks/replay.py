@@ -0,0 +1,336 @@
+# ─────────────────────────────────────────────
+# 네이버 엔드포인트 리플레이 하네스 (녹화 → 로컬 서버 → 전체 스캔 부하 측정)
+#
+#   1) 녹화: 실제 스캔 1회를 돌리며 받은 응답을 모두 보관 (cold 저장소에서 실행)
+#      python benchmarks/replay.py record --market KOSPI --pages 1 --out fixtures/kospi_p1.zip
+#   2) 서버만 띄우기 (다른 도구로 부하를 줄 때)
+#      python benchmarks/replay.py serve fixtures/kospi_p1.zip --port 8765 --latency 80 --error-rate 0.02
+#   3) 측정: 서버를 별도 프로세스로 띄우고 '분석 시작'과 같은 흐름(scan_cli.run_scan)을 실행
+#      python benchmarks/replay.py run fixtures/kospi_p1.zip --latency 80 --throttle-rps 20 [--repeat 3]
+#      --mode jobs: UI 백그라운드 작업 경로(scan_jobs.create_job → start_job, 체크포인트 기록 포함)를 끝까지 실행
+#
+# 보관 파일은 zip: manifest.json + 응답 본문(엔드포인트?정렬된 쿼리 이름으로 저장).
+# 서버 옵션: --latency(중앙값 ms) / --jitter(로그정규 sigma) / --error-rate(500 응답 비율)
+#            / --throttle-rps(초당 허용 요청, 넘으면 429 + Retry-After)
+# ─────────────────────────────────────────────
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def fixture_key(url):
+    # 경로 마지막 부분 + 정렬된 쿼리 (호스트/순서와 무관하게 같은 요청이면 같은 키)
+    parts = urlsplit(url)
+    name = parts.path.rsplit('/', 1)[-1]
+    return f"{name}?{urlencode(sorted(parse_qsl(parts.query)))}"
+
+def _use_temp_store():
+    # scanner는 import 시점에 저장소 위치를 읽으므로 import 전에 비어 있는 디렉터리를 지정
+    tmp = tempfile.mkdtemp(prefix='stockfind_replay_')
+    os.environ['STOCKFIND_DATA_DIR'] = tmp
+    return tmp
+
+# ─────────────────────────────────────────────
+# 녹화
+# ─────────────────────────────────────────────
+def record(args):
+    _use_temp_store()
+    import scan_cli
+    import scanner
+
+    captured = {}
+    def hook(resp, *a, **k):
+        if resp.status_code == 200:
+            captured[fixture_key(resp.url)] = resp.content
+    scanner.get_session().hooks['response'].append(hook)
+    scanner.set_request_rate(args.rate)
+
+    t0 = time.perf_counter()
+    df, _ = scan_cli.run_scan(args.market, scan_cli.parse_pages(args.pages), use_investor=not args.no_investor,
+                              price_source=args.source, compute_workers=0, incremental=False)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    manifest = {
+        'market': args.market, 'pages': args.pages, 'source': args.source,
+        'investor': not args.no_investor, 'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'responses': len(captured), 'bytes': sum(map(len, captured.values())), 'stocks': len(df),
+    }
+    with zipfile.ZipFile(args.out, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2))
+        for key, body in captured.items():
+            zf.writestr(f"responses/{key}", body)
+    print(f"녹화 완료: 응답 {len(captured)}개, {manifest['bytes'] / 1e6:.1f} MB, "
+          f"종목 {len(df)}개, {time.perf_counter() - t0:.1f}s → {args.out}")
+
+# ─────────────────────────────────────────────
+# 로컬 서버
+# ─────────────────────────────────────────────
+def load_archive(path):
+    with zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read('manifest.json'))
+        bodies = {n[len('responses/'):]: zf.read(n) for n in zf.namelist() if n.startswith('responses/')}
+    return manifest, bodies
+
+def _last_pages(bodies):
+    # sise_day는 마지막 페이지를 넘겨 요청하면 마지막 페이지를 다시 준다 (네이버 동작 재현)
+    last = {}
+    for key in bodies:
+        name, _, query = key.partition('?')
+        if name == 'sise_day.naver':
+            q = dict(parse_qsl(query))
+            last[q['code']] = max(last.get(q['code'], 0), int(q['page']))
+    return last
+
+class _Throttle:
+    def __init__(self, rps):
+        self.rps = rps
+        self.tokens = rps
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        if not self.rps:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rps, self.tokens + (now - self.stamp) * self.rps)
+            self.stamp = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+def make_server(bodies, port=0, latency_ms=0.0, jitter=0.3, error_rate=0.0, throttle_rps=0.0, seed=0):
+    last_pages = _last_pages(bodies)
+    throttle = _Throttle(throttle_rps)
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    stats = {'requests': 0, 'served': 0, 'errors': 0, 'throttled': 0, 'missing': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *a):
+            pass
+
+        def _send(self, status, body=b'', headers=()):
+            self.send_response(status)
+            for k, v in headers:
+                self.send_header(k, v)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            stats['requests'] += 1
+            with rng_lock:
+                delay = latency_ms * rng.lognormvariate(0, jitter) / 1000 if latency_ms else 0
+                fail = rng.random() < error_rate
+            if not throttle.allow():
+                stats['throttled'] += 1
+                return self._send(429, headers=[('Retry-After', '1')])
+            time.sleep(delay)
+            if fail:
+                stats['errors'] += 1
+                return self._send(500)
+            key = fixture_key(self.path)
+            body = bodies.get(key)
+            if body is None and key.startswith('sise_day.naver?'):
+                q = dict(parse_qsl(key.partition('?')[2]))
+                if q.get('code') in last_pages and int(q.get('page', 0)) > last_pages[q['code']]:
+                    q['page'] = str(last_pages[q['code']])
+                    body = bodies.get(f"sise_day.naver?{urlencode(sorted(q.items()))}")
+            if body is None:
+                stats['missing'] += 1
+                return self._send(404)
+            stats['served'] += 1
+            self._send(200, body, [('Content-Type', 'text/html; charset=euc-kr')])
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    server.stats = stats
+    return server
+
+def _server_options(ap):
+    ap.add_argument('--latency', type=float, default=0.0, help="응답 지연 중앙값(ms)")
+    ap.add_argument('--jitter', type=float, default=0.3, help="지연 로그정규 분포 sigma")
+    ap.add_argument('--error-rate', type=float, default=0.0, help="HTTP 500 응답 비율")
+    ap.add_argument('--throttle-rps', type=float, default=0.0, help="초당 허용 요청 수 (0이면 제한 없음)")
+    ap.add_argument('--seed', type=int, default=0)
+
+def serve(args):
+    manifest, bodies = load_archive(args.archive)
+    server = make_server(bodies, args.port, args.latency, args.jitter, args.error_rate, args.throttle_rps, args.seed)
+    # run 명령이 포트를 읽어 가도록 첫 줄에 주소를 출력
+    print(f"http://127.0.0.1:{server.server_address[1]}", flush=True)
+    print(f"응답 {len(bodies)}개 ({manifest['market']} pages={manifest['pages']})", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats), file=sys.stderr)
+
+# ─────────────────────────────────────────────
+# 측정
+# ─────────────────────────────────────────────
+def _start_server_process(args):
+    cmd = [sys.executable, os.path.abspath(__file__), 'serve', args.archive, '--port', '0',
+           '--latency', str(args.latency), '--jitter', str(args.jitter), '--error-rate', str(args.error_rate),
+           '--throttle-rps', str(args.throttle_rps), '--seed', str(args.seed)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return proc, proc.stdout.readline().strip()
+
+def run(args):
+    manifest, _ = load_archive(args.archive)
+    proc, base = (None, args.base) if args.base else _start_server_process(args)
+    try:
+        reports = []
+        for i in range(args.repeat):
+            # 반복마다 새 프로세스: 저장소/응답 캐시/계측이 비어 있는 cold 스캔
+            cmd = [sys.executable, os.path.abspath(__file__), '_scan', base, manifest['market'], manifest['pages'],
+                   manifest['source'], str(int(manifest['investor'])), str(args.fetch_workers),
+                   str(args.compute_workers) if args.compute_workers is not None else 'default', str(args.rate),
+                   args.mode]
+            out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+            reports.append(json.loads(out.strip().splitlines()[-1]))
+            r = reports[-1]
+            jobs = (f"  체크포인트 {r['checkpoints']}회 {r['checkpoint_s']:.2f}s ({r['status']})"
+                    if args.mode == 'jobs' else "")
+            print(f"#{i + 1}  {r['stocks']}종목 {r['total_s']:.2f}s  {r['stocks_per_s']:.1f}종목/s  "
+                  f"요청 {r['requests']}회 (재시도 {r['retries']}, 실패 {r['gave_up']})  "
+                  f"지연 p50 {r['p50_ms']:.0f} / p95 {r['p95_ms']:.0f} / p99 {r['p99_ms']:.0f} ms  "
+                  f"첫 결과 {r['first_result_s']:.2f}s{jobs}")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({'manifest': manifest, 'options': vars(args), 'runs': reports}, f, indent=2,
+                          ensure_ascii=False)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+def _run_cli(market, pages, source, investor, fetch_workers, compute_workers, t0, first):
+    import scan_cli
+    def on_result(done, row, res):
+        if not first:
+            first.append(time.perf_counter() - t0)
+    df, timings = scan_cli.run_scan(market, scan_cli.parse_pages(pages), use_investor=investor,
+                                    price_source=source, fetch_workers=fetch_workers,
+                                    compute_workers=compute_workers, on_result=on_result)
+    return len(df), timings, {}
+
+def _run_job(market, pages, source, investor, fetch_workers, compute_workers, t0, first):
+    # UI와 같은 작업 경로: 목록 → 우선순위 저장(create_job) → 백그라운드 스레드 실행(start_job) → 체크포인트
+    import scan_cli
+    import scan_jobs
+
+    flush_s = []
+    flush = scan_jobs.ScanJob._flush
+    def timed_flush(self, status=None):
+        t = time.perf_counter()
+        try:
+            return flush(self, status)
+        finally:
+            flush_s.append(time.perf_counter() - t)
+    scan_jobs.ScanJob._flush = timed_flush
+
+    timings = {}
+    job_id, _ = scan_jobs.create_job([market], scan_cli.parse_pages(pages), use_investor=investor,
+                                     price_source=source, fetch_workers=fetch_workers,
+                                     compute_workers=compute_workers)
+    timings['create_job'] = time.perf_counter() - t0
+    if job_id is None:
+        return 0, timings, {'status': 'empty', 'checkpoints': 0, 'checkpoint_s': 0.0}
+    job = scan_jobs.start_job(job_id)
+    while job.alive():
+        if not first and job.results:
+            first.append(time.perf_counter() - t0)
+        time.sleep(0.01)
+    timings['run'] = time.perf_counter() - t0 - timings['create_job']
+    st = scan_jobs.job_status(job_id)
+    if st['error']:
+        print(f"작업 오류: {st['error']}", file=sys.stderr)
+    return st['done'], timings, {'status': st['status'], 'checkpoints': len(flush_s),
+                                 'checkpoint_s': sum(flush_s)}
+
+def _scan(argv):
+    # run이 띄우는 내부 명령: 로컬 서버를 대상으로 스캔 1회를 돌리고 요약 JSON 한 줄을 출력
+    base, market, pages, source, investor, fetch_workers, compute_workers, rate, mode = argv
+    _use_temp_store()
+    import metrics
+    import scanner
+
+    scanner.set_base_urls(naver=base, fchart=base)
+    scanner.set_request_rate(float(rate))
+    latencies = []
+    scanner.get_session().hooks['response'].append(lambda r, *a, **k: latencies.append(r.elapsed.total_seconds()))
+
+    first = []
+    t0 = time.perf_counter()
+    compute_workers = scanner.COMPUTE_WORKERS if compute_workers == 'default' else int(compute_workers)
+    runner = _run_job if mode == 'jobs' else _run_cli
+    stocks, timings, extra = runner(market, pages, source, bool(int(investor)), int(fetch_workers),
+                                    compute_workers, t0, first)
+    total = time.perf_counter() - t0
+
+    counters = {}
+    for name, _, value in metrics.REGISTRY.snapshot()['counters']:
+        counters[name] = counters.get(name, 0) + value
+    lat = np.array(latencies or [0.0]) * 1000
+    print(json.dumps({
+        'mode': mode, 'stocks': stocks, 'total_s': total, 'stocks_per_s': stocks / total if total else 0.0,
+        'first_result_s': first[0] if first else total, 'timings': timings,
+        'requests': counters.get('http_requests_total', 0), 'retries': counters.get('http_retries_total', 0),
+        'gave_up': counters.get('http_gave_up_total', 0), 'bytes': counters.get('http_bytes_total', 0),
+        'p50_ms': float(np.percentile(lat, 50)), 'p95_ms': float(np.percentile(lat, 95)),
+        'p99_ms': float(np.percentile(lat, 99)), 'max_ms': float(lat.max()), **extra,
+    }))
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '_scan':
+        return _scan(sys.argv[2:])
+    ap = argparse.ArgumentParser(description="네이버 응답 녹화/재생 부하 하네스")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+
+    rec = sub.add_parser('record', help="실제 네이버 응답을 보관 파일로 녹화")
+    rec.add_argument('--market', choices=['KOSPI', 'KOSDAQ'], default='KOSPI')
+    rec.add_argument('--pages', default='1')
+    rec.add_argument('--source', default='naver_html')
+    rec.add_argument('--no-investor', action='store_true')
+    rec.add_argument('--rate', type=float, default=5.0, help="녹화 중 초당 요청 수")
+    rec.add_argument('--out', required=True)
+
+    srv = sub.add_parser('serve', help="보관 파일을 로컬 HTTP 서버로 제공")
+    srv.add_argument('archive')
+    srv.add_argument('--port', type=int, default=8765)
+    _server_options(srv)
+
+    rn = sub.add_parser('run', help="로컬 서버를 대상으로 전체 스캔 측정")
+    rn.add_argument('archive')
+    rn.add_argument('--base', help="이미 떠 있는 서버 주소 (없으면 새로 띄움)")
+    rn.add_argument('--repeat', type=int, default=1)
+    rn.add_argument('--fetch-workers', type=int, default=3)
+    rn.add_argument('--compute-workers', type=int, help="연산 프로세스 수 (기본: 스캐너 기본값)")
+    rn.add_argument('--rate', type=float, default=1000.0, help="스캐너 측 초당 요청 상한")
+    rn.add_argument('--mode', choices=['cli', 'jobs'], default='cli',
+                    help="cli: scan_cli.run_scan / jobs: scan_jobs 작업 (create_job → start_job, 체크포인트 포함)")
+    rn.add_argument('--json', help="측정 결과 저장 경로")
+    _server_options(rn)
+
+    args = ap.parse_args()
+    {'record': record, 'serve': serve, 'run': run}[args.cmd](args)
+
+if __name__ == '__main__':
+    main()
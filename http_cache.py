@@ -0,0 +1,107 @@
+# ─────────────────────────────────────────────
+# URL 단위 HTTP 응답 캐시 (메모리 LRU + 디스크 SQLite LRU)
+#   - 디스크 캐시는 같은 호스트의 모든 Streamlit 세션/CLI 프로세스가 공유
+#   - 만료 여부(TTL)와 재검증(ETag / Last-Modified)은 호출 측(scanner.fetch_cached)이 판단하고
+#     여기서는 저장/조회/용량 관리만 한다
+# ─────────────────────────────────────────────
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+class ResponseCache:
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, mem_bytes=16 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mem_bytes = mem_bytes
+        self._mem = OrderedDict()   # url -> entry (오래 안 쓴 것부터)
+        self._mem_size = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # 호출 측은 closing(...)으로 닫고, 그 안의 with con:으로 트랜잭션만 커밋/롤백한다
+        con = sqlite3.connect(self.path, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("""CREATE TABLE IF NOT EXISTS responses (
+                           url TEXT PRIMARY KEY, body BLOB, etag TEXT, last_modified TEXT,
+                           stored_at REAL, accessed REAL)""")
+        return con
+
+    def _remember(self, url, entry):
+        with self._lock:
+            old = self._mem.pop(url, None)
+            if old is not None:
+                self._mem_size -= len(old['body'])
+            self._mem[url] = entry
+            self._mem_size += len(entry['body'])
+            while self._mem_size > self.mem_bytes and len(self._mem) > 1:
+                _, dropped = self._mem.popitem(last=False)
+                self._mem_size -= len(dropped['body'])
+
+    def get(self, url):
+        # entry: {'body', 'etag', 'last_modified', 'stored_at'} 또는 None
+        with self._lock:
+            entry = self._mem.get(url)
+            if entry is not None:
+                self._mem.move_to_end(url)
+                return entry
+        try:
+            with closing(self._connect()) as con, con:
+                row = con.execute("SELECT body, etag, last_modified, stored_at FROM responses WHERE url=?",
+                                  (url,)).fetchone()
+                if row is not None:
+                    con.execute("UPDATE responses SET accessed=? WHERE url=?", (time.time(), url))
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        entry = {'body': bytes(row[0]), 'etag': row[1], 'last_modified': row[2], 'stored_at': row[3]}
+        self._remember(url, entry)
+        return entry
+
+    def put(self, url, body, etag=None, last_modified=None):
+        now = time.time()
+        entry = {'body': body, 'etag': etag, 'last_modified': last_modified, 'stored_at': now}
+        self._remember(url, entry)
+        try:
+            with closing(self._connect()) as con, con:
+                con.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                            (url, sqlite3.Binary(body), etag, last_modified, now, now))
+                self._prune(con)
+        except sqlite3.Error:
+            pass
+        return entry
+
+    def touch(self, url, entry):
+        # 304 재검증 성공: 본문은 그대로 두고 저장 시각만 갱신
+        entry = dict(entry, stored_at=time.time())
+        self._remember(url, entry)
+        try:
+            with closing(self._connect()) as con, con:
+                con.execute("UPDATE responses SET stored_at=?, accessed=? WHERE url=?",
+                            (entry['stored_at'], entry['stored_at'], url))
+        except sqlite3.Error:
+            pass
+        return entry
+
+    def _prune(self, con):
+        total = con.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for url, size in con.execute("SELECT url, LENGTH(body) FROM responses ORDER BY accessed").fetchall():
+            if total <= target:
+                break
+            con.execute("DELETE FROM responses WHERE url=?", (url,))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._mem_size = 0
+        try:
+            with closing(self._connect()) as con, con:
+                con.execute("DELETE FROM responses")
+        except sqlite3.Error:
+            pass
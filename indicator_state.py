@@ -0,0 +1,333 @@
+# ─────────────────────────────────────────────
+# 종목별 증분 지표 상태
+#   새 일봉 1개를 전체 재계산 없이 O(window)로 반영한다.
+#   - MACD: EMA 누산기 (pandas ewm(adjust=False)와 같은 점화식)
+#   - 일목 9/26/52: 단조 deque 구간 최대/최소, 선행스팬은 26봉 지연 버퍼
+#   - 5/20/60MA, 거래량비, CCI: 고정 길이 윈도 + 누적합
+#   - 주봉/월봉: 시간축별로 진행 중인 봉 1개 + 완료된 봉 (일목 계산에 필요한 만큼만 보관)
+#   같은 날짜의 봉이 다시 들어오면(장중 갱신) 직전 봉 반영 전 상태로 되돌린 뒤 다시 적용한다.
+#   되돌리기 정보는 마지막 봉이 바꾼 것만 남긴다: 스칼라/EMA 값, 각 deque 끝에서 넣고 뺀 원소.
+#   최근 봉의 (날짜, 종가, 거래량)을 함께 보관해 시세 이력이 바뀌면(빈 구간 복구, 수정주가) 알아챈다.
+# ─────────────────────────────────────────────
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from indicators import ICHIMOKU_PERIODS, SENKOU_SHIFT
+from panel import DAILY_FIELDS
+from signals import cloud_state
+from timeframes import TAIL_ROWS, TIMEFRAMES, timeframe_clouds
+
+STATE_VERSION = 4
+_NAN = float('nan')
+_BARS_KEPT = max(ICHIMOKU_PERIODS) + SENKOU_SHIFT + TAIL_ROWS
+_CHECK_BARS = 120    # 이력 대조에 쓰는 최근 봉 수 (60MA · 일목 선행스팬 구간보다 길게)
+
+def _append(d, item):
+    # maxlen deque에 넣고 되돌리기 정보(밀려난 왼쪽 원소, 없으면 None)를 돌려준다
+    dropped = d[0] if len(d) == d.maxlen else None
+    d.append(item)
+    return dropped
+
+def _unappend(d, dropped):
+    d.pop()
+    if dropped is not None:
+        d.appendleft(dropped)
+
+def _div(a, b):
+    # pandas/NumPy 나눗셈과 같은 결과: 0으로 나누면 ±inf, 0/0과 NaN은 NaN (거래정지 종목의 거래량 평균 0)
+    if b == 0:
+        return _NAN if a == 0 or a != a else math.copysign(math.inf, a)
+    return a / b
+
+class _Window:
+    # 고정 길이 윈도 + 누적합 (윈도 안에 NaN이 있으면 NaN, pandas rolling과 동일)
+    __slots__ = ('size', 'values', 'total', 'nans')
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.total = 0.0
+        self.nans = 0
+
+    def push(self, v):
+        # 되돌리기 정보: (이전 합계, 이전 NaN 수, 밀려난 값 또는 None)
+        undo = (self.total, self.nans, None)
+        self.values.append(v)
+        if v != v:
+            self.nans += 1
+        else:
+            self.total += v
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            undo = undo[:2] + (old,)
+            if old != old:
+                self.nans -= 1
+            else:
+                self.total -= old
+        return undo
+
+    def revert(self, undo):
+        self.total, self.nans, old = undo
+        self.values.pop()
+        if old is not None:
+            self.values.appendleft(old)
+
+    def mean(self):
+        if len(self.values) < self.size or self.nans:
+            return _NAN
+        return self.total / self.size
+
+class _Extreme:
+    # 단조 deque 구간 최댓값/최솟값: (봉 번호, 값)
+    __slots__ = ('size', 'is_max', 'q', 'count', 'last_nan')
+
+    def __init__(self, size, is_max):
+        self.size = size
+        self.is_max = is_max
+        self.q = deque()
+        self.count = 0
+        self.last_nan = -1
+
+    def push(self, v):
+        # 되돌리기 정보: (이전 last_nan, 뒤에서 뺀 원소들, 새 원소를 넣었는지, 앞에서 뺀 원소들)
+        i = self.count
+        self.count += 1
+        last_nan, back, front = self.last_nan, [], []
+        q = self.q
+        if v != v:
+            self.last_nan = i
+        else:
+            if self.is_max:
+                while q and q[-1][1] <= v:
+                    back.append(q.pop())
+            else:
+                while q and q[-1][1] >= v:
+                    back.append(q.pop())
+            q.append((i, v))
+        while q and q[0][0] <= i - self.size:
+            front.append(q.popleft())
+        return last_nan, back, v == v, front
+
+    def revert(self, undo):
+        self.last_nan, back, pushed, front = undo
+        self.count -= 1
+        q = self.q
+        q.extendleft(reversed(front))
+        if pushed:
+            q.pop()
+        q.extend(reversed(back))
+
+    def value(self):
+        if self.count < self.size or self.last_nan > self.count - 1 - self.size or not self.q:
+            return _NAN
+        return self.q[0][1]
+
+def _ema_step(prev, x, span):
+    # pandas ewm(span, adjust=False).mean()의 한 스텝
+    if prev != prev:
+        return x
+    if x != x or x == prev:
+        return prev
+    alpha = 2.0 / (span + 1.0)
+    old_wt = 1.0 - alpha
+    return (old_wt * prev + alpha * x) / (old_wt + alpha)
+
+def _period_key(date, tf):
+    # timeframes.period_keys와 같은 구간: 주 = 월~일, 월 = 달력 월
+    if tf == 'W':
+        return (int(np.datetime64(date, 'D').astype(np.int64)) + 3) // 7
+    return date.year * 12 + date.month
+
+class _PeriodBars:
+    # 한 시간축의 진행 중인 봉 1개 + 완료된 봉 (종가, 고가, 저가, 거래량)
+    __slots__ = ('tf', 'key', 'bar', 'done', 'n_done')
+
+    def __init__(self, tf):
+        self.tf = tf
+        self.key = None
+        self.bar = None
+        self.done = deque(maxlen=_BARS_KEPT)
+        self.n_done = 0
+
+    def push(self, date, close, high, low, volume):
+        # 되돌리기 정보: (이전 구간 키, 이전 진행 중인 봉, 완료 봉 목록에 넣었는지, 밀려난 완료 봉)
+        undo = (self.key, self.bar, False, None)
+        key = _period_key(date, self.tf)
+        if key != self.key:
+            if self.bar is not None:
+                undo = (self.key, self.bar, True, _append(self.done, self.bar))
+                self.n_done += 1
+            self.key = key
+            self.bar = (close, high, low, volume)
+        else:
+            _, p_high, p_low, p_vol = self.bar
+            self.bar = (close, max(p_high, high), min(p_low, low), p_vol + volume)
+        return undo
+
+    def revert(self, undo):
+        self.key, self.bar, finished, dropped = undo
+        if finished:
+            _unappend(self.done, dropped)
+            self.n_done -= 1
+
+    def count(self):
+        return self.n_done + (1 if self.bar is not None else 0)
+
+    def cloud(self):
+        # 보관 봉 수(최대 _BARS_KEPT)가 데이터부족 기준보다 많으므로 보관분만으로 판정해도 같다
+        bars = list(self.done) + ([self.bar] if self.bar is not None else [])
+        arr = np.array(bars, dtype=np.float64).reshape(-1, 4)
+        cols = {'종가': arr[:, 0], '고가': arr[:, 1], '저가': arr[:, 2]}
+        return int(timeframe_clouds(cols, np.array([len(arr)]))[0])
+
+class IndicatorState:
+    def __init__(self):
+        self.version = STATE_VERSION
+        self.last_date = None
+        self.n_daily = 0
+        self.n_valid = 0
+        self.ema12 = self.ema26 = self.ema_signal = _NAN
+        self.close_5, self.close_20, self.close_60 = _Window(5), _Window(20), _Window(60)
+        self.volume_20 = _Window(20)
+        self.tp_20 = _Window(20)
+        self.highs = {p: _Extreme(p, True) for p in ICHIMOKU_PERIODS}
+        self.lows = {p: _Extreme(p, False) for p in ICHIMOKU_PERIODS}
+        self.cloud_raw = deque(maxlen=SENKOU_SHIFT + 1)
+        self.daily_tail = deque(maxlen=TAIL_ROWS + 1)
+        self.periods = {tf: _PeriodBars(tf) for tf in TIMEFRAMES}
+        self.recent = deque(maxlen=_CHECK_BARS)
+        self._undo = None
+
+    @classmethod
+    def from_frame(cls, df_price):
+        state = cls()
+        state.extend(df_price)
+        return state
+
+    def matches(self, df_price):
+        # 이 상태를 만든 이력과 df_price가 같은지: 보관한 최근 봉 구간의 날짜가 빠짐없이 같고
+        # 종가/거래량도 같아야 한다 (마지막 봉은 장중 갱신으로 바뀔 수 있어 날짜만 본다)
+        if not self.recent:
+            return False
+        dates = df_price['날짜']
+        part = df_price[(dates >= self.recent[0][0]) & (dates <= self.last_date)]
+        if len(part) != len(self.recent):
+            return False
+        last = len(part) - 1
+        for i, (bar, date, close, volume) in enumerate(zip(self.recent, part['날짜'], part['종가'], part['거래량'])):
+            if bar[0] != date or (i < last and (bar[1] != float(close) or bar[2] != float(volume))):
+                return False
+        return True
+
+    def extend(self, df_price):
+        cols = [df_price[c].to_numpy() for c in ('날짜', '종가', '고가', '저가', '거래량')]
+        last = len(df_price) - 1
+        for i, (date, close, high, low, volume) in enumerate(zip(*cols)):
+            date = pd.Timestamp(date)
+            if i == last or (self.last_date is not None and date <= self.last_date):
+                self.update(date, float(close), float(high), float(low), float(volume))
+            else:
+                # 되돌리기 정보는 마지막 봉 것만 필요
+                self._undo = None
+                self._apply(date, float(close), float(high), float(low), float(volume))
+        return self
+
+    def update(self, date, close, high, low, volume):
+        if self.last_date is not None:
+            if date < self.last_date:
+                return
+            if date == self.last_date:
+                # 장중 갱신: 직전 봉 반영 전 상태로 되돌린 뒤 다시 적용
+                if self._undo is None:
+                    return
+                self._revert(self._undo)
+        self._undo = self._apply(date, close, high, low, volume)
+
+    def _windows(self):
+        return (self.close_5, self.close_20, self.close_60, self.volume_20, self.tp_20)
+
+    def _revert(self, undo):
+        # _apply가 돌려준 되돌리기 정보로 그 봉 반영 전 상태를 복원 (구조마다 독립이라 순서 무관)
+        (self.last_date, self.n_daily, self.n_valid, self.ema12, self.ema26, self.ema_signal,
+         recent, windows, highs, lows, cloud, tail, periods) = undo
+        _unappend(self.recent, recent)
+        for w, u in zip(self._windows(), windows):
+            w.revert(u)
+        for p in ICHIMOKU_PERIODS:
+            self.highs[p].revert(highs[p])
+            self.lows[p].revert(lows[p])
+        _unappend(self.cloud_raw, cloud)
+        if tail is not None:
+            _unappend(self.daily_tail, tail[0])
+        for tf, u in periods.items():
+            self.periods[tf].revert(u)
+
+    def _apply(self, date, close, high, low, volume):
+        # 봉 1개 반영, 반환: 되돌리기 정보 (_revert)
+        undo = (self.last_date, self.n_daily, self.n_valid, self.ema12, self.ema26, self.ema_signal)
+        self.last_date = date
+        self.n_daily += 1
+        recent = _append(self.recent, (date, close, volume))
+        windows = [w.push(v) for w, v in zip(self._windows()[:4], (close, close, close, volume))]
+        highs = {p: self.highs[p].push(high) for p in ICHIMOKU_PERIODS}
+        lows = {p: self.lows[p].push(low) for p in ICHIMOKU_PERIODS}
+
+        self.ema12 = _ema_step(self.ema12, close, 12)
+        self.ema26 = _ema_step(self.ema26, close, 26)
+        macd = self.ema12 - self.ema26
+        self.ema_signal = _ema_step(self.ema_signal, macd, 9)
+
+        tp = (high + low + close) / 3
+        windows.append(self.tp_20.push(tp))
+        if self.tp_20.mean() == self.tp_20.mean():
+            # 평균 절대 편차는 윈도 전체가 필요 → O(20)
+            tp_ma = sum(self.tp_20.values) / self.tp_20.size
+            mad = sum(abs(x - tp_ma) for x in self.tp_20.values) / self.tp_20.size
+            cci = (tp - tp_ma) / (0.015 * mad) if mad != 0 else _NAN
+        else:
+            cci = _NAN
+
+        tenkan, kijun, senkou_b_base = ((self.highs[p].value() + self.lows[p].value()) / 2
+                                        for p in ICHIMOKU_PERIODS)
+        cloud = _append(self.cloud_raw, ((tenkan + kijun) / 2, senkou_b_base))
+        if len(self.cloud_raw) == self.cloud_raw.maxlen:
+            senkou_a, senkou_b = self.cloud_raw[0]
+        else:
+            senkou_a = senkou_b = _NAN
+
+        vol_ma = self.volume_20.mean()
+        row = {
+            '종가': close,
+            '5MA': self.close_5.mean(),
+            '20MA': self.close_20.mean(),
+            '60MA': self.close_60.mean(),
+            'MACD_hist': macd - self.ema_signal,
+            'CCI': cci,
+            'vol_ratio': _div(volume, vol_ma),
+            'senkou_a': senkou_a,
+            'senkou_b': senkou_b,
+        }
+        tail = None
+        if not (math.isnan(senkou_a) or math.isnan(senkou_b) or math.isnan(cci)):
+            tail = (_append(self.daily_tail, row),)
+            self.n_valid += 1
+
+        periods = {tf: bars.push(date, close, high, low, volume) for tf, bars in self.periods.items()}
+        return undo + (recent, windows, highs, lows, cloud, tail, periods)
+
+    def tail(self):
+        # panel.compute_universe와 같은 형식의 최근 5봉 요약 + 시간축별 구름대 코드
+        daily = None
+        if self.n_valid >= TAIL_ROWS + 1:
+            daily = [{f: row[f] for f in DAILY_FIELDS} for row in reversed(self.daily_tail)][:TAIL_ROWS]
+        clouds = {tf: bars.cloud() for tf, bars in self.periods.items()}
+        if daily is not None:
+            clouds['D'] = cloud_state(daily)
+        return {
+            'n_daily': self.n_daily,
+            'daily': daily,
+            'clouds': clouds,
+        }
@@ -0,0 +1,132 @@
+# ─────────────────────────────────────────────
+# 보조지표 계산 (sliding-window 벡터화)
+#   - rolling().apply(lambda) 같은 봉별 파이썬 콜백 없이 NumPy 윈도 뷰로 계산
+#   - 1-D(한 종목) / 2-D(날짜 × 종목) 배열 모두 axis=0 기준으로 동작
+#   - 결측 처리는 pandas rolling(min_periods=window)과 동일: 윈도에 NaN이 있으면 NaN
+# ─────────────────────────────────────────────
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+ICHIMOKU_PERIODS = (9, 26, 52)
+SENKOU_SHIFT = 26
+
+def _rolling(values, window, reducer):
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if window >= 1 and values.shape[0] >= window:
+        out[window - 1:] = reducer(sliding_window_view(values, window, axis=0))
+    return out
+
+def rolling_mean_np(values, window):
+    return _rolling(values, window, lambda w: w.mean(axis=-1))
+
+def rolling_std_np(values, window, ddof=1):
+    return _rolling(values, window, lambda w: w.std(axis=-1, ddof=ddof))
+
+def rolling_max_np(values, window):
+    return _rolling(values, window, lambda w: w.max(axis=-1))
+
+def rolling_min_np(values, window):
+    return _rolling(values, window, lambda w: w.min(axis=-1))
+
+def rolling_mad_np(values, window):
+    # 평균 절대 편차: 윈도별 평균을 빼고 절댓값 평균
+    def _mad(w):
+        return np.abs(w - w.mean(axis=-1, keepdims=True)).mean(axis=-1)
+    return _rolling(values, window, _mad)
+
+def _like(series, values):
+    return pd.Series(values, index=series.index, name=series.name)
+
+def rolling_mean(series, window):
+    return _like(series, rolling_mean_np(series.to_numpy(dtype=np.float64), window))
+
+def rolling_std(series, window):
+    return _like(series, rolling_std_np(series.to_numpy(dtype=np.float64), window))
+
+def rolling_max(series, window):
+    return _like(series, rolling_max_np(series.to_numpy(dtype=np.float64), window))
+
+def rolling_min(series, window):
+    return _like(series, rolling_min_np(series.to_numpy(dtype=np.float64), window))
+
+def rolling_mad(series, window):
+    return _like(series, rolling_mad_np(series.to_numpy(dtype=np.float64), window))
+
+# ─────────────────────────────────────────────
+# 지표
+# ─────────────────────────────────────────────
+def get_ma5_slope(price_series):
+    try:
+        ma5 = rolling_mean(price_series, 5)
+        if len(ma5) < 4:
+            return 0
+        slope = ma5.iloc[-1] - ma5.iloc[-3]
+        pct   = slope / ma5.iloc[-3] * 100 if ma5.iloc[-3] != 0 else 0
+        return pct
+    except Exception:
+        return 0
+
+def calc_bollinger(series, period=20, std_mult=2):
+    ma = rolling_mean(series, period)
+    std = rolling_std(series, period)
+    upper = ma + std_mult * std
+    lower = ma - std_mult * std
+    bandwidth = (upper - lower) / ma * 100
+    return upper, lower, bandwidth
+
+def calc_cci(df, period=20):
+    tp = (df['고가'] + df['저가'] + df['종가']) / 3
+    ma = rolling_mean(tp, period)
+    mad = rolling_mad(tp, period)
+    return (tp - ma) / (0.015 * mad.replace(0, np.nan))
+
+def ichimoku_lines(high, low, periods=ICHIMOKU_PERIODS):
+    # (전환선, 기준선, 선행스팬B 원값) — 선행 이동(shift)은 호출 측에서 처리
+    return tuple(_like(high, (rolling_max_np(high.to_numpy(dtype=np.float64), p) +
+                              rolling_min_np(low.to_numpy(dtype=np.float64), p)) / 2)
+                 for p in periods)
+
+def shift_rows(values, n):
+    out = np.full(values.shape, np.nan)
+    if n < values.shape[0]:
+        out[n:] = values[:values.shape[0] - n]
+    return out
+
+def cloud_np(high, low, periods=ICHIMOKU_PERIODS, shift=SENKOU_SHIFT):
+    # 배열판 add_cloud: (선행스팬 A, 선행스팬 B)
+    tenkan, kijun, senkou_b_base = ((rolling_max_np(high, p) + rolling_min_np(low, p)) / 2 for p in periods)
+    return shift_rows((tenkan + kijun) / 2, shift), shift_rows(senkou_b_base, shift)
+
+def calc_macd(close, fast=12, slow=26, signal=9):
+    ema_fast = close.ewm(span=fast, adjust=False).mean()
+    ema_slow = close.ewm(span=slow, adjust=False).mean()
+    macd = ema_fast - ema_slow
+    macd_signal = macd.ewm(span=signal, adjust=False).mean()
+    return macd, macd_signal, macd - macd_signal
+
+# ─────────────────────────────────────────────
+# 종목 1개 단위 지표 프레임 (analyze_price / 배치 엔진 대조 기준)
+# ─────────────────────────────────────────────
+def add_cloud(df, periods=ICHIMOKU_PERIODS, shift=SENKOU_SHIFT):
+    # 전환/기준/선행B 원값 + shift만큼 미룬 선행스팬 A/B (df에 컬럼을 더해 그대로 반환)
+    df['tenkan_sen'], df['kijun_sen'], df['senkou_b_base'] = ichimoku_lines(df['고가'], df['저가'], periods)
+    df['senkou_a'] = shift_rows(((df['tenkan_sen'] + df['kijun_sen']) / 2).to_numpy(), shift)
+    df['senkou_b'] = shift_rows(df['senkou_b_base'].to_numpy(), shift)
+    return df
+
+def daily_indicator_frame(df_price):
+    # 저장용 float32 가격을 계산용 float64로 (이 변환이 유일한 복사본)
+    df = df_price.set_index('날짜').astype(np.float64)
+    
+    df['5MA'] = rolling_mean(df['종가'], 5)
+    df['20MA'] = rolling_mean(df['종가'], 20)
+    df['60MA'] = rolling_mean(df['종가'], 60)
+    
+    df['MACD'], df['MACD_Signal'], df['MACD_hist'] = calc_macd(df['종가'])
+    
+    df['CCI'] = calc_cci(df)
+    df['vol_ratio'] = df['거래량'] / rolling_mean(df['거래량'], 20)
+    
+    return add_cloud(df).dropna(subset=['senkou_a', 'senkou_b', 'CCI'])
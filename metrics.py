@@ -0,0 +1,146 @@
+# ─────────────────────────────────────────────
+# 스캔 계측 (단계별 소요 시간 · 카운터 · 종목별 실패 사유)
+#   - 프로세스 전역 레지스트리 REGISTRY에 누적 (카운터는 줄어들지 않음 → Prometheus counter)
+#   - 연산 프로세스 풀에서 잰 값은 snapshot()으로 돌려받아 메인 프로세스에서 merge()
+#   - 한 번의 스캔만 보려면 시작 시점 snapshot과 diff_snapshots()로 차이를 구한다
+# ─────────────────────────────────────────────
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+STAGES = ('http', 'parse', 'indicators', 'weekly', 'score', 'backtest', 'render')
+MAX_FAILED_CODES = 1000    # 실패 사유를 보관할 최대 종목 수 (오래된 것부터 버림)
+MAX_REASONS_PER_CODE = 5
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timers = {}                 # stage -> [횟수, 합계(초), 최대(초)]
+        self.counters = {}               # (이름, ((라벨, 값), ...)) -> 값
+        self.failures = OrderedDict()    # 종목코드 -> [(시각, 단계, 사유), ...]
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            t = self.timers.setdefault(stage, [0, 0.0, 0.0])
+            t[0] += 1
+            t[1] += seconds
+            t[2] = max(t[2], seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def fail(self, code, stage, reason):
+        self.inc('stock_failures_total', stage=stage)
+        self._record_failure(code, time.time(), stage, str(reason))
+
+    def _record_failure(self, code, ts, stage, reason):
+        with self._lock:
+            reasons = self.failures.pop(code, [])
+            self.failures[code] = (reasons + [(ts, stage, reason)])[-MAX_REASONS_PER_CODE:]
+            while len(self.failures) > MAX_FAILED_CODES:
+                self.failures.popitem(last=False)
+
+    def snapshot(self):
+        # 피클/JSON 가능한 평범한 dict
+        with self._lock:
+            return {
+                'taken_at': time.time(),
+                'timers': {k: list(v) for k, v in self.timers.items()},
+                'counters': [[name, [list(l) for l in labels], v] for (name, labels), v in self.counters.items()],
+                'failures': {code: [list(r) for r in rs] for code, rs in self.failures.items()},
+            }
+
+    def merge(self, snap):
+        for stage, (count, total, peak) in snap['timers'].items():
+            with self._lock:
+                t = self.timers.setdefault(stage, [0, 0.0, 0.0])
+                t[0] += count
+                t[1] += total
+                t[2] = max(t[2], peak)
+        for name, labels, value in snap['counters']:
+            self.inc(name, value, **dict(labels))
+        for code, reasons in snap['failures'].items():
+            for ts, stage, reason in reasons:
+                self._record_failure(code, ts, stage, reason)
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.failures.clear()
+
+REGISTRY = Metrics()
+timer = REGISTRY.timer
+inc = REGISTRY.inc
+fail = REGISTRY.fail
+
+def diff_snapshots(after, before):
+    # before 이후에 쌓인 몫만 (최대값은 구간별로 알 수 없어 누적 최대를 그대로 둔다)
+    timers = {}
+    for stage, (count, total, peak) in after['timers'].items():
+        b = before['timers'].get(stage, [0, 0.0, 0.0])
+        if count - b[0]:
+            timers[stage] = [count - b[0], total - b[1], peak]
+    base = {(name, tuple(map(tuple, labels))): v for name, labels, v in before['counters']}
+    counters = [[name, labels, v - base.get((name, tuple(map(tuple, labels))), 0)]
+                for name, labels, v in after['counters']]
+    failures = {code: [r for r in rs if r[0] >= before['taken_at']] for code, rs in after['failures'].items()}
+    return {
+        'taken_at': after['taken_at'],
+        'timers': timers,
+        'counters': [c for c in counters if c[2]],
+        'failures': {code: rs for code, rs in failures.items() if rs},
+    }
+
+def to_json(snap, indent=2):
+    return json.dumps(snap, ensure_ascii=False, indent=indent)
+
+def _prom_labels(labels):
+    if not labels:
+        return ''
+    parts = ('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels)
+    return '{' + ','.join(parts) + '}'
+
+def to_prometheus(snap, prefix='stockfind_'):
+    lines = [f"# TYPE {prefix}stage_seconds summary"]
+    for stage, (count, total, _) in sorted(snap['timers'].items()):
+        lines.append(f'{prefix}stage_seconds_count{{stage="{stage}"}} {count}')
+        lines.append(f'{prefix}stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+    lines.append(f"# TYPE {prefix}stage_seconds_max gauge")
+    for stage, (_, _, peak) in sorted(snap['timers'].items()):
+        lines.append(f'{prefix}stage_seconds_max{{stage="{stage}"}} {peak:.6f}')
+    seen = set()
+    for name, labels, value in sorted(snap['counters'], key=lambda c: (c[0], c[1])):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# TYPE {prefix}{name} counter")
+        lines.append(f"{prefix}{name}{_prom_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+def timer_rows(snap):
+    # 진단 패널용: (단계, 횟수, 합계 s, 평균 ms, 최대 ms)
+    order = {s: i for i, s in enumerate(STAGES)}
+    rows = []
+    for stage, (count, total, peak) in sorted(snap['timers'].items(), key=lambda kv: order.get(kv[0], len(order))):
+        rows.append((stage, count, round(total, 3), round(total / count * 1000, 2) if count else 0.0,
+                     round(peak * 1000, 2)))
+    return rows
+
+def counter_rows(snap):
+    return [(name, ', '.join(f"{k}={v}" for k, v in labels), value)
+            for name, labels, value in sorted(snap['counters'], key=lambda c: (c[0], c[1]))]
+
+def failure_rows(snap):
+    return [(code, stage, reason) for code, rs in snap['failures'].items() for _, stage, reason in rs]
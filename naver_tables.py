@@ -0,0 +1,105 @@
+# ─────────────────────────────────────────────
+# 네이버 금융 표 추출기 (lxml, 원본 bytes → 타입 지정 NumPy 컬럼)
+#   - pd.read_html / BeautifulSoup('html.parser') 경로를 대체
+#   - euc-kr 디코딩, 콤마 제거, 숫자/날짜 변환을 한 번의 순회로 처리
+# ─────────────────────────────────────────────
+import re
+import threading
+
+import numpy as np
+from lxml import etree, html as lxml_html
+
+_CODE_RE = re.compile(r'code=(\d{6})')
+_PAGE_RE = re.compile(r'page=(\d+)')
+_DATE_RE = re.compile(r'^\d{4}\.\d{2}\.\d{2}$')
+
+# lxml 파서 인스턴스는 스레드 간 공유하면 안 되므로 스레드별로 하나씩 둔다
+_local = threading.local()
+
+def _parser():
+    p = getattr(_local, 'parser', None)
+    if p is None:
+        p = _local.parser = lxml_html.HTMLParser(encoding='euc-kr')
+    return p
+
+def parse_document(raw):
+    # 빈 응답/깨진 문서는 ValueError로 통일 (호출 측은 수집 실패로 처리)
+    try:
+        if isinstance(raw, str):
+            return lxml_html.fromstring(raw)
+        return lxml_html.fromstring(raw, parser=_parser())
+    except etree.ParserError as e:
+        raise ValueError(f"HTML 파싱 실패: {e}") from e
+
+def _cell_texts(tr):
+    return [td.text_content().strip() for td in tr.iterchildren('td')]
+
+def _to_float(text):
+    t = text.replace(',', '').replace('%', '')
+    try:
+        return float(t)
+    except ValueError:
+        return np.nan
+
+def last_page_number(doc):
+    # 페이지 네비의 '맨뒤' 링크 (td.pgRR a)
+    hrefs = doc.xpath("//td[contains(concat(' ', @class, ' '), ' pgRR ')]/a/@href")
+    if hrefs:
+        m = _PAGE_RE.search(hrefs[0])
+        if m:
+            return int(m.group(1))
+    return None
+
+def extract_price_table(raw):
+    # sise_day 일별시세 표: 날짜 | 종가 | 전일비 | 시가 | 고가 | 저가 | 거래량
+    doc = parse_document(raw)
+    dates, close, high, low, volume = [], [], [], [], []
+    for tr in doc.xpath("//table[contains(concat(' ', @class, ' '), ' type2 ')]//tr"):
+        cells = _cell_texts(tr)
+        if len(cells) < 7 or not _DATE_RE.match(cells[0]):
+            continue
+        dates.append(cells[0].replace('.', '-'))
+        close.append(_to_float(cells[1]))
+        high.append(_to_float(cells[4]))
+        low.append(_to_float(cells[5]))
+        volume.append(_to_float(cells[6]))
+    columns = {
+        '날짜': np.array(dates, dtype='datetime64[D]'),
+        '종가': np.array(close, dtype=np.float64),
+        '고가': np.array(high, dtype=np.float64),
+        '저가': np.array(low, dtype=np.float64),
+        '거래량': np.array(volume, dtype=np.float64),
+    }
+    return columns, last_page_number(doc)
+
+def _code_rows(doc, min_cells):
+    for tr in doc.xpath("//table[contains(concat(' ', @class, ' '), ' type_2 ')]//tr"):
+        tds = tr.xpath('td')
+        if len(tds) < min_cells:
+            continue
+        a = tr.xpath('.//a[@href]')
+        if not a:
+            continue
+        m = _CODE_RE.search(a[0].get('href'))
+        if m:
+            yield m.group(1), a[0], tds
+
+def extract_market_sum(raw):
+    # sise_market_sum 시가총액 표 → (종목코드, 종목명, 등락률 %)
+    doc = parse_document(raw)
+    codes, names, changes = [], [], []
+    for code, a, tds in _code_rows(doc, 5):
+        codes.append(code)
+        names.append(a.text_content().strip())
+        changes.append(_to_float(tds[4].text_content().strip()))
+    return codes, names, changes
+
+def extract_foreign_ratios(raw):
+    # sise_foreign_hold 외국인 보유 표 → ({종목코드: 보유율}, 마지막 페이지)
+    doc = parse_document(raw)
+    result = {}
+    for code, _, tds in _code_rows(doc, 8):
+        ratio = _to_float(tds[7].text_content().strip())
+        if not np.isnan(ratio):
+            result[code] = ratio
+    return result, last_page_number(doc)
@@ -0,0 +1,89 @@
+# ─────────────────────────────────────────────
+# 유니버스 배치 지표 엔진 (날짜 × 종목 2-D 배열)
+#   - 종목별 시세를 오른쪽(최신 봉) 기준으로 정렬해 (T, N) 배열로 쌓고
+#     지표마다 전 종목을 한 번에 계산한다
+#   - 앞쪽은 NaN으로 채우므로 rolling/shift/EMA 결과가 종목별 계산과 같다
+#   - 출력은 calc_signal_score가 쓰는 최근 5개 일봉(최신순)과 일/주/월 구름대 코드
+#     (주/월봉 집계와 구름대 판정은 timeframes)
+# ─────────────────────────────────────────────
+import numpy as np
+
+from indicators import cloud_np, rolling_mean_np, rolling_mad_np
+from timeframes import TAIL_ROWS, frame_clouds, tail_cloud_codes, tail_index, to_panel
+
+DAILY_FIELDS = ('종가', '5MA', '20MA', '60MA', 'MACD_hist', 'CCI', 'vol_ratio', 'senkou_a', 'senkou_b')
+MIN_DAILY_BARS = 80
+
+def ema_np(values, span):
+    # pandas ewm(span, adjust=False).mean()과 같은 점화식 (앞쪽 NaN은 첫 관측값부터 시작)
+    alpha = 2.0 / (span + 1.0)
+    old_wt = 1.0 - alpha
+    denom = old_wt + alpha
+    out = np.empty_like(values)
+    weighted = values[0].copy()
+    out[0] = weighted
+    for t in range(1, values.shape[0]):
+        cur = values[t]
+        started = ~np.isnan(weighted)
+        upd = started & ~np.isnan(cur) & (weighted != cur)
+        weighted = np.where(upd, (old_wt * weighted + alpha * cur) / denom, weighted)
+        weighted = np.where(~started, cur, weighted)
+        out[t] = weighted
+    return out
+
+def daily_panel(close, high, low, volume):
+    macd = ema_np(close, 12) - ema_np(close, 26)
+    tp = (high + low + close) / 3
+    mad = rolling_mad_np(tp, 20)
+    mad[mad == 0] = np.nan
+    senkou_a, senkou_b = cloud_np(high, low)
+    # 거래정지 종목은 거래량 평균이 0 → inf / NaN (종목별 pandas 경로와 같은 값, 경고만 끈다)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol_ratio = volume / rolling_mean_np(volume, 20)
+    return {
+        '종가': close,
+        '5MA': rolling_mean_np(close, 5),
+        '20MA': rolling_mean_np(close, 20),
+        '60MA': rolling_mean_np(close, 60),
+        'MACD_hist': macd - ema_np(macd, 9),
+        'CCI': (tp - rolling_mean_np(tp, 20)) / (0.015 * mad),
+        'vol_ratio': vol_ratio,
+        'senkou_a': senkou_a,
+        'senkou_b': senkou_b,
+    }
+
+def _tail_rows(fields, names, idx, col):
+    return [{f: fields[f][idx[j, col], col] for f in names} for j in range(idx.shape[0])]
+
+def _concat(frames, col):
+    return np.concatenate([f[col].to_numpy(dtype=np.float64) for f in frames]) if frames else np.empty(0)
+
+def compute_universe(frames, natives=None):
+    # frames: 종목별 일봉 DataFrame(날짜/종가/고가/저가/거래량, 날짜 오름차순) 목록
+    # natives: 종목별 소스 주/월봉 {시간축: DataFrame} 또는 None
+    # 반환: 종목별 {'daily': 최근 5봉 dict 목록 또는 None, 'clouds': {'D'/'W'/'M': 구름대 코드} 또는 None}
+    n = len(frames)
+    empty = [{'daily': None, 'clouds': None} for _ in range(n)]
+    usable = [i for i, f in enumerate(frames) if f is not None and len(f) >= MIN_DAILY_BARS]
+    if not usable:
+        return empty
+    sub = [frames[i] for i in usable]
+    counts = np.array([len(f) for f in sub], dtype=np.int64)
+    length = int(counts.max())
+    cols = {c: to_panel(_concat(sub, c), counts, length) for c in ('종가', '고가', '저가', '거래량')}
+
+    # ─── 일봉 ───
+    daily = daily_panel(cols['종가'], cols['고가'], cols['저가'], cols['거래량'])
+    d_valid = ~(np.isnan(daily['senkou_a']) | np.isnan(daily['senkou_b']) | np.isnan(daily['CCI']))
+    d_idx, d_count = tail_index(d_valid)
+    d_clouds, _ = tail_cloud_codes(daily['종가'], daily['senkou_a'], daily['senkou_b'], d_valid)
+
+    # ─── 주봉 / 월봉: 한 번에 집계, 소스가 준 봉이 있으면 그 종목만 교체 ───
+    tf_clouds = frame_clouds(sub, [natives[i] for i in usable] if natives is not None else None)
+
+    for col, i in enumerate(usable):
+        out = empty[i]
+        out['clouds'] = {'D': int(d_clouds[col]), **{tf: int(c[col]) for tf, c in tf_clouds.items()}}
+        if d_count[col] >= TAIL_ROWS + 1:
+            out['daily'] = _tail_rows(daily, DAILY_FIELDS, d_idx, col)
+    return empty
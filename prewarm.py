@@ -0,0 +1,118 @@
+# ─────────────────────────────────────────────
+# 장 마감 후 사전 계산 데몬 (모든 UI 세션이 공유하는 warm 저장소 채우기)
+#
+#   python prewarm.py                                  # 평일 16:10(KST)마다 KOSPI+KOSDAQ 1-40페이지
+#   python prewarm.py --once                           # 지금 한 번만 실행
+#   python prewarm.py --markets KOSPI --pages 1-10 --at 18:00
+#
+# 1) 시가총액 목록(페이지별)  2) 시세 · 외국인 지분율 수집  3) 지표/신호 계산  4) warm 저장소에 기록
+# 2~3은 scan_jobs 작업으로 실행하고 진행 상황을 볼 때마다 끝난 종목을 warm 저장소에 기록한다.
+# 데몬이 중간에 죽으면 다음 실행이 마지막 장 마감 이후 만든 같은 대상의 끝나지 않은 작업을 이어서
+# 실행하므로(없으면 새 작업이 warm 결과를 완료로 채운다) 이미 끝난 종목은 다시 받지 않는다.
+# UI는 마지막 장 마감 이후 계산된 종목을 바로 쓰고 나머지만 실시간으로 받는다.
+# ─────────────────────────────────────────────
+import argparse
+import datetime as dt
+import sys
+import time
+
+import scan_jobs
+import scanner
+from scan_cli import parse_pages
+
+DEFAULT_RUN_AT = dt.time(16, 10)     # 마감 후 시간외 단일가까지 반영되도록 여유를 둔다
+RETRY_SEC = 600                      # 실행 후에도 결과가 없으면 이만큼 쉬고 다시 시도
+
+def log(msg):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {msg}", file=sys.stderr, flush=True)
+
+def next_run(run_at, now=None):
+    # 다음 실행 시각 (epoch 초): 오늘 실행 시각이 지났고 오늘 마감분이 아직 없으면 바로 실행
+    now = dt.datetime.fromtimestamp(time.time() if now is None else now, scanner.MARKET_TZ)
+    day = now.date()
+    while True:
+        at = dt.datetime.combine(day, run_at, scanner.MARKET_TZ)
+        if day.weekday() < 5 and (at >= now or _stale(at.timestamp())):
+            return max(at.timestamp(), now.timestamp())
+        day += dt.timedelta(days=1)
+
+def _stale(ts):
+    # ts 시점 기준 마지막 마감 이후 계산된 결과가 하나도 없으면 True
+    newest = max((hi for _, _, hi in scan_jobs.warm_status().values()), default=0)
+    return newest < scanner.last_close(ts)
+
+def _unfinished_job(markets, pages, options):
+    # 마지막 장 마감 이후 만든 같은 대상/옵션의 prewarm 작업 중 끝나지 않은 것 (없으면 None)
+    for st in scan_jobs.list_jobs(20):
+        params = st['params']
+        if (st['created'] >= scanner.last_close() and params.get('prewarm')
+                and st['status'] in ('interrupted', 'cancelled', 'failed') and st['pending']
+                and params['markets'] == list(markets) and params['pages'] == list(pages)
+                and all(params.get(k) == v for k, v in options.items())):
+            return st['job_id']
+    return None
+
+def run_prewarm(markets, pages, **options):
+    t0 = time.perf_counter()
+    job_id = _unfinished_job(markets, pages, options)
+    if job_id is not None:
+        log(f"{job_id} 이어서 실행 (중단된 이전 실행)")
+    else:
+        for market in markets:
+            df = scan_jobs.save_market_pages(market, pages)
+            log(f"{market} 시가총액 목록 {len(df):,}종목")
+        # 오늘 이미 계산한 종목은 warm 결과로 채워지고 나머지만 수집/계산
+        job_id, failed = scan_jobs.create_job(markets, pages, use_warm=True, prewarm=True, **options)
+        if job_id is None:
+            log(f"⚠️ 대상 종목 없음 (실패 페이지: {failed})")
+            return None
+    job = scan_jobs.start_job(job_id)
+    while job.alive():
+        time.sleep(5)
+        # 체크포인트에 기록된 완료 종목을 바로 공유 (데몬이 죽어도 여기까지는 남는다)
+        published = scan_jobs.publish_results(job_id)
+        st = scan_jobs.job_status(job_id)
+        log(f"  {job_id}: 완료 {st['done']:,} / 실패 {st['failed']:,} / 남음 {st['pending']:,}"
+            f" (warm {published:,})")
+    st = scan_jobs.job_status(job_id)
+    published = scan_jobs.publish_results(job_id)
+    log(f"✅ {job_id} {st['status']}: warm 결과 {published:,}종목 기록 ({time.perf_counter() - t0:.0f}s)"
+        + (f" — 오류 {st['error']}" if st['error'] else ""))
+    return st
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="장 마감 후 사전 계산 데몬")
+    ap.add_argument('--markets', nargs='+', choices=['KOSPI', 'KOSDAQ'], default=['KOSPI', 'KOSDAQ'])
+    ap.add_argument('--pages', default='1-40', help="시가총액 페이지 (예: 1-40, 1,3,5)")
+    ap.add_argument('--at', default=DEFAULT_RUN_AT.strftime('%H:%M'), help="평일 실행 시각 (KST, HH:MM)")
+    ap.add_argument('--once', action='store_true', help="지금 한 번만 실행하고 종료")
+    ap.add_argument('--source', choices=list(scanner.PRICE_SOURCES), default=scanner.DEFAULT_PRICE_SOURCE)
+    ap.add_argument('--fetch-workers', type=int, default=scanner.FETCH_WORKERS)
+    ap.add_argument('--compute-workers', type=int, default=scanner.COMPUTE_WORKERS)
+    ap.add_argument('--rate', type=float, default=scanner.REQUEST_RATE, help="초당 최대 요청 수")
+    ap.add_argument('--no-investor', action='store_true', help="외국인 지분율 수집 생략")
+    args = ap.parse_args(argv)
+
+    scanner.set_request_rate(args.rate)
+    pages = parse_pages(args.pages)
+    options = dict(use_investor=not args.no_investor, price_source=args.source,
+                   fetch_workers=args.fetch_workers, compute_workers=args.compute_workers, incremental=True)
+    if args.once:
+        run_prewarm(args.markets, pages, **options)
+        return 0
+
+    run_at = dt.time.fromisoformat(args.at)
+    while True:
+        at = next_run(run_at)
+        if at > time.time():
+            log(f"다음 실행: {dt.datetime.fromtimestamp(at, scanner.MARKET_TZ):%Y-%m-%d %H:%M}")
+            time.sleep(at - time.time())
+        try:
+            run_prewarm(args.markets, pages, **options)
+        except Exception as e:
+            log(f"❌ {e.__class__.__name__}: {e}")
+        if _stale(time.time()):
+            time.sleep(RETRY_SEC)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# ─────────────────────────────────────────────
+# 유니버스 시세 메모리 맵 패널 (연산 프로세스 여러 개가 한 벌을 공유)
+#   - 디렉터리 하나에 필드별 (종목, 봉) .npy (가격 float32, 거래량 float64 — scanner.PRICE_DTYPES와 같다)
+#     + 날짜(1970-01-01 기준 일수, int32) + meta.json
+#   - 종목 1개의 시세가 연속된 한 행이고 최신 봉이 오른쪽 끝 (앞쪽 빈칸은 NaN / -1)
+#   - 읽는 쪽은 mmap_mode='r'로 열어 운영체제 페이지 캐시를 공유하므로
+#     프로세스마다 pickle로 받은 복사본을 들고 있지 않는다
+# ─────────────────────────────────────────────
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+PANEL_FIELDS = {'종가': 'close', '고가': 'high', '저가': 'low', '거래량': 'volume'}
+PANEL_DTYPES = {'종가': np.float32, '고가': np.float32, '저가': np.float32, '거래량': np.float64}
+_NO_DAY = -1
+
+def _path(path, name):
+    return os.path.join(path, f'{name}.npy')
+
+def write_panel(path, codes, frames):
+    # frames: 종목별 시세 (None = 없음) → path 디렉터리에 패널 저장, path 반환
+    counts = [0 if f is None else len(f) for f in frames]
+    length = max(counts, default=0)
+    os.makedirs(path, exist_ok=True)
+    columns = [(name, PANEL_DTYPES[col], np.nan, col) for col, name in PANEL_FIELDS.items()]
+    columns.append(('days', np.int32, _NO_DAY, '날짜'))
+    for name, dtype, fill, col in columns:
+        mm = np.lib.format.open_memmap(_path(path, name), mode='w+', dtype=dtype, shape=(len(frames), length))
+        mm[:] = fill
+        for i, (f, n) in enumerate(zip(frames, counts)):
+            if not n:
+                continue
+            values = f[col].to_numpy()
+            if col == '날짜':
+                values = values.astype('datetime64[D]').astype(np.int64)
+            mm[i, length - n:] = values
+        mm.flush()
+        del mm
+    with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as fp:
+        json.dump({'codes': list(codes), 'counts': counts, 'length': length}, fp)
+    return path
+
+def open_panel(path):
+    # 읽기 전용 패널: {'codes', 'counts', 'length', 'days', 필드명: (종목, 봉) 메모리 맵}
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as fp:
+        panel = json.load(fp)
+    panel['counts'] = np.array(panel['counts'], dtype=np.int64)
+    for name in list(PANEL_FIELDS.values()) + ['days']:
+        panel[name] = np.load(_path(path, name), mmap_mode='r')
+    return panel
+
+def panel_frame(panel, i):
+    # i번째 종목의 시세 DataFrame (scanner.PRICE_COLUMNS / PRICE_DTYPES 형식), 없으면 None
+    n = int(panel['counts'][i])
+    if not n:
+        return None
+    rows = slice(panel['length'] - n, panel['length'])
+    columns = {'날짜': panel['days'][i, rows].astype('datetime64[D]').astype('datetime64[ns]')}
+    columns.update((col, np.array(panel[name][i, rows])) for col, name in PANEL_FIELDS.items())
+    return pd.DataFrame(columns, copy=False)
+
+def panel_frames(panel, start=0, stop=None):
+    stop = len(panel['codes']) if stop is None else stop
+    return [panel_frame(panel, i) for i in range(start, stop)]
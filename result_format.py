@@ -0,0 +1,74 @@
+# ─────────────────────────────────────────────
+# 결과 표시 문자열 (화면에 그리는 행 / 파일로 쓰는 행에서만)
+#   - 스캔 결과는 숫자와 코드로 된 타입 지정 DataFrame(scanner.result_frame)으로 보관하고
+#     문자열은 여기서 필요한 행만큼만 만든다
+#   - short=True는 표 화면용 압축 표기
+# ─────────────────────────────────────────────
+import numpy as np
+import pandas as pd
+
+from signals import (CCI_LABELS, CLOUD_COLUMNS, CLOUD_LABELS, MA_CROSS_LABELS, MA_CROSS_PERIODS, Cloud,
+                     CciZone, cloud_label, ma_cross_parts, signal_label)
+
+CHART_URL = "https://finance.naver.com/item/fchart.naver?code={code}"
+
+SHORT_CLOUD_LABELS = {**CLOUD_LABELS, Cloud.ABOVE: "📈위", Cloud.BELOW: "📉아래", Cloud.INSIDE: "🌫️내부"}
+
+def format_change(v):
+    if np.isnan(v): return "-"
+    return f"{v:+.2f}%" if v else "0.00%"
+
+def format_disparity(v):
+    return f"{'+' if v >= 0 else ''}{round(float(v), 2)}%"
+
+def format_cci(value, zone):
+    return f"{round(float(value), 1)} {CCI_LABELS[CciZone(zone)]}"
+
+def volume_ratio(v):
+    return round(float(v), 1) if not np.isnan(v) else 1.0
+
+def format_volume(v):
+    vol_r = volume_ratio(v)
+    return f"{vol_r}배 📈" if vol_r >= 2.0 else f"{vol_r}배 📉" if vol_r < 0.5 else f"{vol_r}배"
+
+def format_ratio(ratio):
+    if np.isnan(ratio) or ratio <= 0: return "-"
+    if ratio >= 30:   return f"{ratio:.2f}% 🔴고비중"
+    elif ratio >= 15: return f"{ratio:.2f}% 🟠중비중"
+    elif ratio >= 5:  return f"{ratio:.2f}% 🟡저비중"
+    else:             return f"{ratio:.2f}% ⚪미미"
+
+def format_ma_cross(code, short=False):
+    parts = zip(MA_CROSS_PERIODS, ma_cross_parts(code))
+    if short:
+        return ' '.join(f"{p}{MA_CROSS_LABELS[s][:2]}" for p, s in parts)
+    return ' '.join(f"{p}:{MA_CROSS_LABELS[s]}" for p, s in parts)
+
+def format_frame(df, short=False):
+    # 타입 지정 결과 → 표시용 문자열 DataFrame (CCI상태는 CCI에 합치고, 외국인지분율 뒤에 차트 링크)
+    cloud_labels = SHORT_CLOUD_LABELS if short else CLOUD_LABELS
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if col == '등락률':
+            out[col] = [format_change(v) for v in s]
+        elif col == '이격률':
+            out[col] = [format_disparity(v) for v in s]
+        elif col == '신호':
+            out[col] = [signal_label(v) for v in s]
+        elif col in CLOUD_COLUMNS:
+            out[col] = [cloud_label(v, CLOUD_COLUMNS[col], cloud_labels) for v in s]
+        elif col == 'MA크로스':
+            out[col] = [format_ma_cross(v, short) for v in s]
+        elif col == 'CCI':
+            out[col] = [format_cci(v, z) for v, z in zip(s, df['CCI상태'])]
+        elif col == 'CCI상태':
+            continue
+        elif col == '거래량':
+            out[col] = [format_volume(v) for v in s]
+        elif col == '외국인지분율':
+            out[col] = [format_ratio(v) for v in s]
+            out['차트'] = [CHART_URL.format(code=c) for c in df['코드']]
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
@@ -0,0 +1,70 @@
+# ─────────────────────────────────────────────
+# 스캔 결과 수집기
+#   - 결과 행을 총점 내림차순 위치에 바로 삽입 (전체 재정렬 없음)
+#   - 신호 그룹별 개수를 삽입 시점에 신호 코드 조회로 누적
+#   - 화면 갱신은 N행 또는 N ms마다 한 번으로 제한
+#   - 행은 숫자/코드 튜플 그대로 보관하고 frame()에서 타입 지정 DataFrame으로
+# ─────────────────────────────────────────────
+import bisect
+import time
+
+import pandas as pd
+
+from signals import FILTER_MASKS, METRIC_MASKS
+
+class ResultSink:
+    def __init__(self, columns, dtypes=None, every_rows=25, every_ms=500):
+        self.columns = list(columns)
+        self.dtypes = dtypes     # 컬럼 → dtype (scanner.COLUMN_DTYPES)
+        self._score = self.columns.index('총점')
+        self._signal = self.columns.index('신호')
+        self.every_rows = every_rows
+        self.every_ms = every_ms
+        self._keys = []      # -총점 오름차순 (= 총점 내림차순)
+        self._rows = []
+        self._signals = []   # 행별 신호 코드
+        self.counts = dict.fromkeys(METRIC_MASKS, 0)
+        self._pending = 0
+        self._last_render = float('-inf')
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, row):
+        signal = int(row[self._signal])
+        # 동점은 먼저 들어온 행이 위
+        pos = bisect.bisect_right(self._keys, -row[self._score])
+        self._keys.insert(pos, -row[self._score])
+        self._rows.insert(pos, row)
+        self._signals.insert(pos, signal)
+        for name, mask in METRIC_MASKS.items():
+            self.counts[name] += int(mask[signal])
+        self._pending += 1
+
+    def due(self):
+        # 마지막 갱신 이후 행이 충분히 쌓였거나 시간이 지났으면 True
+        if not self._pending:
+            return False
+        return (self._pending >= self.every_rows
+                or (time.perf_counter() - self._last_render) * 1000 >= self.every_ms)
+
+    def mark_rendered(self):
+        self._pending = 0
+        self._last_render = time.perf_counter()
+
+    def matching(self, f):
+        if f not in FILTER_MASKS:
+            return len(self._rows)
+        return int(FILTER_MASKS[f][self._signals].sum())
+
+    def frame(self, f='전체', limit=None):
+        # 필터를 통과한 상위 limit개 행만 DataFrame으로 (화면에 보이는 부분만 스타일링)
+        if f in FILTER_MASKS:
+            keep = FILTER_MASKS[f][self._signals]
+            rows = [r for r, k in zip(self._rows, keep) if k]
+        else:
+            rows = self._rows
+        if limit is not None:
+            rows = rows[:limit]
+        df = pd.DataFrame.from_records(rows, columns=self.columns)
+        return df.astype(self.dtypes) if self.dtypes else df
@@ -0,0 +1,166 @@
+# ─────────────────────────────────────────────
+# 헤드리스 전체 시장 스캔 (cron / 서버용)
+#
+#   python scan_cli.py --market KOSPI --pages 1-40 --out kospi.parquet
+#   python scan_cli.py --market KOSDAQ --pages 1,2,3 --out kosdaq.csv --no-investor
+#   python scan_cli.py --market KOSPI --pages 1-40 --backtest --out backtest.csv
+#
+# 결과는 총점 내림차순으로 columnar 파일(parquet/feather, pyarrow 필요) 또는 CSV로 저장한다.
+# --backtest는 받아 둔 시세 전 구간의 봉마다 신호를 다시 매겨 신호별 이후 수익률/적중률 표를 저장한다.
+# 단계별 소요 시간(엔진 import 포함)을 stderr로 출력한다.
+# ─────────────────────────────────────────────
+import time
+
+_t_start = time.perf_counter()
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+import backtest
+import metrics
+import scanner
+from result_format import format_frame
+
+_t_import = time.perf_counter() - _t_start
+
+def parse_pages(text):
+    pages = []
+    for part in text.split(','):
+        part = part.strip()
+        if '-' in part:
+            a, b = part.split('-', 1)
+            pages.extend(range(int(a), int(b) + 1))
+        elif part:
+            pages.append(int(part))
+    return sorted(set(pages))
+
+def write_results(df, path, fmt=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower() or 'parquet'
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    elif fmt == 'feather':
+        df.to_feather(path)
+    elif fmt == 'csv':
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+    else:
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
+
+def run_scan(market, pages, use_investor=True, price_source=scanner.DEFAULT_PRICE_SOURCE,
+             fetch_workers=scanner.FETCH_WORKERS, compute_workers=scanner.COMPUTE_WORKERS,
+             incremental=True, memo=True, log=None, on_result=None):
+    timings = {}
+    t0 = time.perf_counter()
+    market_df = scanner.get_market_sum_pages(pages, market)
+    timings['market_list'] = time.perf_counter() - t0
+    if log and market_df.attrs.get('failed_pages'):
+        log(f"⚠️ 시가총액 페이지 수집 실패: {market_df.attrs['failed_pages']}")
+    if market_df.empty:
+        return scanner.result_frame([]), timings
+
+    foreign_dict = None
+    if use_investor:
+        # 백그라운드 수집 (시세 수집과 겹쳐 진행되므로 별도 단계 시간은 없음)
+        foreign_dict = scanner.start_foreign_ratio_loader(market=market, codes=market_df['종목코드'].tolist())
+
+    t0 = time.perf_counter()
+    results = []
+    rows = market_df[['종목코드', '종목명', '등락률']].itertuples(index=False, name=None)
+    for done, row, res in scanner.iter_scan(rows, foreign_dict=foreign_dict, fetch_investor=use_investor,
+                                            price_source=price_source, fetch_workers=fetch_workers,
+                                            compute_workers=compute_workers, incremental=incremental,
+                                            memo=memo):
+        if res:
+            results.append(res)
+        if on_result:
+            on_result(done, row, res)
+        if log and done % 50 == 0:
+            log(f"  {done}/{len(market_df)} 종목 처리")
+    timings['analyze'] = time.perf_counter() - t0
+
+    df = scanner.result_frame(results)
+    df = df.sort_values('총점', ascending=False).reset_index(drop=True)
+    df.insert(0, '시장', market)
+    df['스캔시각'] = pd.Timestamp.now().floor('s')
+    return df, timings
+
+def run_backtest(market, pages, price_source=scanner.DEFAULT_PRICE_SOURCE, max_pages=scanner.MIN_PRICE_PAGES,
+                 fetch_workers=scanner.FETCH_WORKERS, compute_workers=scanner.COMPUTE_WORKERS, log=None):
+    timings = {}
+    t0 = time.perf_counter()
+    market_df = scanner.get_market_sum_pages(pages, market)
+    timings['market_list'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    frames = backtest.load_history(market_df['종목코드'].tolist(), price_source, max_pages, fetch_workers, log=log)
+    timings['fetch'] = time.perf_counter() - t0
+    if log:
+        log(f"  시세 {sum(f is not None for f in frames)}/{len(frames)} 종목, "
+            f"봉 {sum(len(f) for f in frames if f is not None):,}개")
+
+    t0 = time.perf_counter()
+    stats = backtest.run_backtest(frames, workers=compute_workers)
+    timings['backtest'] = time.perf_counter() - t0
+    df = backtest.backtest_frame(stats)
+    df.insert(0, '시장', market)
+    return df, timings
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="스마트 데이터 스캐너 헤드리스 실행")
+    ap.add_argument('--market', choices=['KOSPI', 'KOSDAQ'], default='KOSPI')
+    ap.add_argument('--pages', default='1', help="시가총액 페이지 (예: 1-40, 1,3,5)")
+    ap.add_argument('--out', required=True, help="결과 파일 (.parquet / .feather / .csv)")
+    ap.add_argument('--format', choices=['parquet', 'feather', 'csv'])
+    ap.add_argument('--source', choices=list(scanner.PRICE_SOURCES), default=scanner.DEFAULT_PRICE_SOURCE)
+    ap.add_argument('--fetch-workers', type=int, default=scanner.FETCH_WORKERS)
+    ap.add_argument('--compute-workers', type=int, default=scanner.COMPUTE_WORKERS)
+    ap.add_argument('--rate', type=float, default=scanner.REQUEST_RATE, help="초당 최대 요청 수")
+    ap.add_argument('--no-investor', action='store_true', help="외국인 지분율 수집 생략")
+    ap.add_argument('--no-incremental', action='store_true', help="저장된 지표 상태를 쓰지 않고 전체 계산")
+    ap.add_argument('--no-memo', action='store_true', help="결과 메모를 쓰지 않고 모든 종목 다시 계산")
+    ap.add_argument('--base-url', help="네이버 대신 요청할 주소 (예: 리플레이 서버 http://127.0.0.1:8765)")
+    ap.add_argument('--metrics', help="계측 결과 파일 (.json 또는 .prom = Prometheus 텍스트)")
+    ap.add_argument('--backtest', action='store_true', help="전 구간 신호 백테스트 (신호별 이후 수익률/적중률)")
+    ap.add_argument('--history-pages', type=int, default=scanner.MIN_PRICE_PAGES,
+                    help="백테스트용 일별시세 페이지 수 (페이지당 10거래일)")
+    args = ap.parse_args(argv)
+
+    def log(msg):
+        print(msg, file=sys.stderr, flush=True)
+
+    scanner.set_request_rate(args.rate)
+    if args.base_url:
+        scanner.set_base_urls(naver=args.base_url, fchart=args.base_url)
+    t0 = time.perf_counter()
+    if args.backtest:
+        df, timings = run_backtest(args.market, parse_pages(args.pages), price_source=args.source,
+                                   max_pages=args.history_pages, fetch_workers=args.fetch_workers,
+                                   compute_workers=args.compute_workers, log=log)
+        with metrics.timer('write'):
+            write_results(df, args.out, args.format)
+    else:
+        df, timings = run_scan(args.market, parse_pages(args.pages), use_investor=not args.no_investor,
+                               price_source=args.source, fetch_workers=args.fetch_workers,
+                               compute_workers=args.compute_workers, incremental=not args.no_incremental,
+                               memo=not args.no_memo, log=log)
+        with metrics.timer('write'):
+            # 숫자/코드 결과를 화면과 같은 표시 문자열로 바꿔 저장
+            write_results(format_frame(df), args.out, args.format)
+    if args.metrics:
+        snap = metrics.REGISTRY.snapshot()
+        text = metrics.to_prometheus(snap) if args.metrics.endswith('.prom') else metrics.to_json(snap)
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    if args.backtest:
+        log(f"✅ 백테스트 {int(df['건수'].iloc[-1]):,}건 ({len(df) - 1}개 신호) → {args.out}")
+    else:
+        log(f"✅ {len(df)}개 종목 → {args.out}")
+    log(f"  import {_t_import:.2f}s  " + "  ".join(f"{k} {v:.2f}s" for k, v in timings.items())
+        + f"  total {time.perf_counter() - t0:.2f}s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,372 @@
+# ─────────────────────────────────────────────
+# 전체 시장 스캔 작업 관리 (우선순위 · 체크포인트 · 중단/재개)
+#   - 작업 = 시장/페이지/옵션 + 우선순위대로 정렬한 종목 목록 (SQLite에 저장)
+#   - 실행은 서버 프로세스의 백그라운드 스레드: 브라우저 새로고침/rerun과 무관하게 계속되고
+#     화면은 작업 ID로 다시 붙는다
+#   - 끝난 종목 결과는 N행 또는 N초마다 디스크에 기록, 재개 시 끝난 종목은 건너뛴다
+#   - 서버가 죽어 'running'으로 남은 작업은 실행 중인 스레드가 없으므로 '중단됨'으로 보고 재개할 수 있다
+#   - 장 마감 후 미리 계산한 목록/결과(prewarm.py)는 모든 세션이 공유하는 warm 테이블에 두고,
+#     마지막 장 마감 이후 계산된 종목은 작업을 만들 때 바로 완료로 넣는다 (나머지만 실시간 수집)
+# ─────────────────────────────────────────────
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+import metrics
+import scanner
+from scanner import last_close
+
+JOB_STORE_PATH = os.path.join(scanner.DATA_DIR, 'scan_jobs.sqlite')
+CHECKPOINT_ROWS = 50       # 이만큼 끝나면 기록
+CHECKPOINT_SEC = 5.0       # 또는 마지막 기록 후 이만큼 지나면 기록
+
+# 우선순위 이름 -> 표시명 (관심 종목은 어떤 순서든 맨 앞)
+PRIORITIES = {
+    'page': "시가총액 순 (페이지 순서)",
+    'change': "등락률 절댓값 큰 순",
+}
+
+PENDING, DONE, FAILED = 0, 1, 2
+
+def _open_job_store():
+    os.makedirs(os.path.dirname(JOB_STORE_PATH) or '.', exist_ok=True)
+    con = sqlite3.connect(JOB_STORE_PATH, timeout=30)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""CREATE TABLE IF NOT EXISTS scan_jobs (
+                       job_id TEXT PRIMARY KEY, created REAL, updated REAL,
+                       status TEXT, params TEXT, total INTEGER)""")
+    con.execute("""CREATE TABLE IF NOT EXISTS scan_job_items (
+                       job_id TEXT NOT NULL, seq INTEGER, code TEXT NOT NULL, name TEXT,
+                       change REAL, market TEXT, state INTEGER, result BLOB,
+                       PRIMARY KEY (job_id, code))""")
+    con.execute("""CREATE TABLE IF NOT EXISTS warm_lists (
+                       market TEXT NOT NULL, page INTEGER NOT NULL, computed REAL, rows TEXT,
+                       PRIMARY KEY (market, page))""")
+    if 'options' not in {r[1] for r in con.execute("PRAGMA table_info(warm_results)")}:
+        # 예전 형식(계산 옵션 구분 없음)은 어떤 소스/옵션 결과인지 알 수 없어 버린다 (장 마감마다 다시 채워진다)
+        con.execute("DROP TABLE IF EXISTS warm_results")
+    con.execute("""CREATE TABLE IF NOT EXISTS warm_results (
+                       code TEXT NOT NULL, options TEXT NOT NULL, market TEXT, computed REAL, result BLOB,
+                       PRIMARY KEY (code, options))""")
+    return con
+
+# ─────────────────────────────────────────────
+# 장 마감 후 사전 계산 결과 (모든 세션 공유)
+# ─────────────────────────────────────────────
+def save_market_pages(market, pages):
+    # 시가총액 목록을 페이지별로 받아 warm_lists에 저장하고 합친 DataFrame을 돌려준다
+    frames, now = [], time.time()
+    con = _open_job_store()
+    try:
+        for page in pages:
+            df = scanner.get_market_sum_pages([page], market)
+            if df.empty:
+                continue
+            frames.append(df)
+            with con:
+                con.execute("INSERT OR REPLACE INTO warm_lists VALUES (?, ?, ?, ?)",
+                            (market, page, now, json.dumps(df.values.tolist(), ensure_ascii=False)))
+    finally:
+        con.close()
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['종목코드', '종목명', '등락률'])
+
+def warm_market_list(pages, market):
+    # 모든 페이지가 마지막 장 마감 이후에 저장됐으면 그 목록, 아니면 None
+    con = _open_job_store()
+    try:
+        rows = dict(con.execute(f"SELECT page, rows FROM warm_lists WHERE market = ? AND computed >= ? "
+                                f"AND page IN ({','.join('?' * len(pages))})",
+                                (market, last_close(), *pages)).fetchall())
+    finally:
+        con.close()
+    if len(rows) < len(set(pages)):
+        return None
+    df = pd.DataFrame([r for p in pages for r in json.loads(rows[p])], columns=['종목코드', '종목명', '등락률'])
+    df.attrs['failed_pages'] = []
+    return df
+
+def _warm_options(options):
+    # 결과 값을 바꾸는 작업 옵션 (ScanJob._run과 같은 기본값). 같은 옵션으로 계산한 warm 결과만 쓴다
+    return json.dumps({'price_source': options.get('price_source', scanner.DEFAULT_PRICE_SOURCE),
+                       'use_investor': bool(options.get('use_investor', True))}, sort_keys=True)
+
+def warm_results(codes, **options):
+    # 마지막 장 마감 이후 같은 옵션으로 계산된 결과 {종목코드: 결과 튜플}
+    codes = list(codes)
+    out = {}
+    con = _open_job_store()
+    try:
+        for i in range(0, len(codes), 500):
+            part = codes[i:i + 500]
+            out.update(con.execute(f"SELECT code, result FROM warm_results WHERE options = ? AND computed >= ? "
+                                   f"AND code IN ({','.join('?' * len(part))})",
+                                   (_warm_options(options), last_close(), *part)).fetchall())
+    finally:
+        con.close()
+    return {code: pickle.loads(blob) for code, blob in out.items()}
+
+def publish_results(job_id):
+    # 작업의 완료 결과를 공유 warm_results로 (계산 시각 = 작업 생성 시각, 시세는 그 이후에 받았다)
+    con = _open_job_store()
+    try:
+        with con:
+            created, params = con.execute("SELECT created, params FROM scan_jobs WHERE job_id = ?",
+                                          (job_id,)).fetchone()
+            cur = con.execute("INSERT OR REPLACE INTO warm_results "
+                              "SELECT code, ?, market, ?, result FROM scan_job_items WHERE job_id = ? AND state = ?",
+                              (_warm_options(json.loads(params)), created, job_id, DONE))
+            return cur.rowcount
+    finally:
+        con.close()
+
+def warm_status():
+    # 시장별 (종목 수, 가장 오래된 계산 시각, 가장 최근 계산 시각)
+    con = _open_job_store()
+    try:
+        return {m: (n, lo, hi) for m, n, lo, hi in con.execute(
+            "SELECT market, COUNT(*), MIN(computed), MAX(computed) FROM warm_results GROUP BY market")}
+    finally:
+        con.close()
+
+def prioritize(market_df, order='page', watchlist=()):
+    # market_df: 종목코드/종목명/등락률/시장 (시장별 페이지 순서) → 스캔 순서로 정렬한 DataFrame
+    df = market_df.copy()
+    df['_rank'] = df.groupby('시장').cumcount()
+    watch = set(watchlist)
+    df['_watch'] = ~df['종목코드'].isin(watch)
+    if order == 'change':
+        df['_key'] = -df['등락률'].abs().fillna(0)
+    elif order == 'page':
+        df['_key'] = df['_rank']
+    else:
+        raise ValueError(f"지원하지 않는 우선순위: {order}")
+    df = df.drop_duplicates('종목코드').sort_values(['_watch', '_key', '_rank', '시장'], kind='stable')
+    return df.drop(columns=['_rank', '_watch', '_key']).reset_index(drop=True)
+
+def _rebind_warm(ordered, warm, options):
+    # warm 결과에 지금 목록의 종목명/등락률과 오늘 외국인 지분율 스냅샷을 넣는다 (메모 결과와 같은 방식)
+    # 스냅샷에 없는 종목은 계산 당시 지분율을 그대로 둔다 (마지막 장 마감 이후 값이라 같은 날 기준)
+    if not warm:
+        return warm
+    use_investor = options.get('use_investor', True)
+    snapshots = {m: scanner.load_foreign_snapshot(m)[0] for m in ordered['시장'].unique()} if use_investor else {}
+    out = {}
+    for code, name, change, market in ordered[['종목코드', '종목명', '등락률', '시장']].itertuples(index=False, name=None):
+        res = warm.get(code)
+        if res is not None:
+            ratio = snapshots.get(market, {}).get(code, res[-1]) if use_investor else None
+            out[code] = scanner.rebind_result(res, (code, name, change), ratio)
+    return out
+
+def create_job(markets, pages, order='page', watchlist=(), use_warm=False, **options):
+    # 시가총액 목록을 받아 우선순위대로 저장하고 작업 ID를 돌려준다 (실행은 start_job)
+    # use_warm: 마지막 장 마감 이후 계산된 목록/결과를 쓰고 나머지 종목만 실행 대상으로 남긴다
+    frames, failed = [], {}
+    for market in markets:
+        df = warm_market_list(pages, market) if use_warm else None
+        if df is None:
+            df = scanner.get_market_sum_pages(pages, market)
+        if df.attrs.get('failed_pages'):
+            failed[market] = df.attrs['failed_pages']
+        frames.append(df.assign(시장=market))
+    market_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if market_df.empty:
+        return None, failed
+    ordered = prioritize(market_df, order, watchlist)
+    warm = _rebind_warm(ordered, warm_results(ordered['종목코드'], **options), options) if use_warm else {}
+
+    job_id = time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+    params = {'markets': list(markets), 'pages': list(pages), 'order': order,
+              'watchlist': list(watchlist), 'warm': len(warm), **options}
+    now = time.time()
+    con = _open_job_store()
+    try:
+        with con:
+            con.execute("INSERT INTO scan_jobs VALUES (?, ?, ?, ?, ?, ?)",
+                        (job_id, now, now, 'pending', json.dumps(params, ensure_ascii=False), len(ordered)))
+            con.executemany("INSERT INTO scan_job_items VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            [(job_id, seq, code, name, float(change), market,
+                              DONE if code in warm else PENDING,
+                              pickle.dumps(warm[code], protocol=pickle.HIGHEST_PROTOCOL) if code in warm else None)
+                             for seq, (code, name, change, market) in enumerate(
+                                 ordered[['종목코드', '종목명', '등락률', '시장']].itertuples(index=False, name=None))])
+    finally:
+        con.close()
+    return job_id, failed
+
+class _MarketRatios:
+    # 시장별 ForeignRatios를 종목코드로 골라 쓰는 iter_scan용 조회 객체
+    def __init__(self, loaders, market_of):
+        self.loaders = loaders
+        self.market_of = market_of
+
+    def get(self, code, default=None):
+        loader = self.loaders.get(self.market_of.get(code))
+        return loader.get(code, default) if loader is not None else default
+
+    def __len__(self):
+        return sum(len(r) for r in self.loaders.values())
+
+class ScanJob:
+    # 실행 중인 작업 1개 (백그라운드 스레드). results는 이번 실행에서 끝난 결과 (화면이 증분으로 읽는다)
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.results = []
+        self.done = 0
+        self.error = None
+        self._cancel = threading.Event()
+        self._buffer = []
+        self._last_flush = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def alive(self):
+        return self._thread.is_alive()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _flush(self, status=None):
+        rows, self._buffer = self._buffer, []
+        con = _open_job_store()
+        try:
+            with con:
+                con.executemany("UPDATE scan_job_items SET state = ?, result = ? WHERE job_id = ? AND code = ?",
+                                [(state, blob, self.job_id, code) for code, state, blob in rows])
+                con.execute("UPDATE scan_jobs SET updated = ?, status = COALESCE(?, status) WHERE job_id = ?",
+                            (time.time(), status, self.job_id))
+        finally:
+            con.close()
+        self._last_flush = time.perf_counter()
+        metrics.inc('scan_job_checkpoints_total')
+
+    def _run(self):
+        status = 'failed'
+        try:
+            params, items = _load_pending(self.job_id)
+            self._flush('running')
+            foreign = None
+            if params.get('use_investor', True):
+                markets = {it[3] for it in items}
+                foreign = _MarketRatios(
+                    {m: scanner.start_foreign_ratio_loader(market=m, codes=[it[0] for it in items if it[3] == m])
+                     for m in markets},
+                    {it[0]: it[3] for it in items})
+            scan = scanner.iter_scan(
+                [it[:3] for it in items], foreign_dict=foreign, fetch_investor=params.get('use_investor', True),
+                price_source=params.get('price_source', scanner.DEFAULT_PRICE_SOURCE),
+                fetch_workers=params.get('fetch_workers', scanner.FETCH_WORKERS),
+                compute_workers=params.get('compute_workers', scanner.COMPUTE_WORKERS),
+                incremental=params.get('incremental', True), memo=params.get('memo', True))
+            try:
+                for _, row, res in scan:
+                    self.done += 1
+                    if res:
+                        self.results.append(res)
+                    self._buffer.append((row[0], DONE if res else FAILED,
+                                         pickle.dumps(res, protocol=pickle.HIGHEST_PROTOCOL) if res else None))
+                    if (len(self._buffer) >= CHECKPOINT_ROWS
+                            or time.perf_counter() - self._last_flush >= CHECKPOINT_SEC):
+                        self._flush()
+                    if self._cancel.is_set():
+                        break
+            finally:
+                # 수집/연산 풀 정리 (중간에 멈춘 경우 남은 종목은 PENDING 그대로)
+                scan.close()
+            status = 'cancelled' if self._cancel.is_set() else 'done'
+        except Exception as e:
+            self.error = f"{e.__class__.__name__}: {e}"
+        finally:
+            self._flush(status)
+
+def _load_pending(job_id):
+    con = _open_job_store()
+    try:
+        row = con.execute("SELECT params FROM scan_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        items = con.execute("SELECT code, name, change, market FROM scan_job_items "
+                            "WHERE job_id = ? AND state = ? ORDER BY seq", (job_id, PENDING)).fetchall()
+    finally:
+        con.close()
+    return json.loads(row[0]), items
+
+# 이 서버 프로세스에서 실행 중인 작업 (세션이 바뀌어도 같은 객체에 붙는다)
+_RUNNING = {}
+_running_lock = threading.Lock()
+
+def start_job(job_id):
+    # 새로 시작하거나 끝나지 않은 종목만 이어서 실행. 이미 실행 중이면 그 작업을 돌려준다
+    with _running_lock:
+        job = _RUNNING.get(job_id)
+        if job is None or not job.alive():
+            job = ScanJob(job_id)
+            _RUNNING[job_id] = job
+            job._thread.start()
+        return job
+
+def running_job(job_id):
+    job = _RUNNING.get(job_id)
+    return job if job is not None and job.alive() else None
+
+def cancel_job(job_id):
+    job = running_job(job_id)
+    if job is not None:
+        job.cancel()
+    return job
+
+def job_status(job_id):
+    # {'status', 'total', 'done', 'failed', 'params', ...}. 실행 스레드 없이 'running'이면 'interrupted'
+    con = _open_job_store()
+    try:
+        row = con.execute("SELECT created, updated, status, params, total FROM scan_jobs WHERE job_id = ?",
+                          (job_id,)).fetchone()
+        counts = dict(con.execute("SELECT state, COUNT(*) FROM scan_job_items WHERE job_id = ? GROUP BY state",
+                                  (job_id,)).fetchall())
+    finally:
+        con.close()
+    if row is None:
+        return None
+    created, updated, status, params, total = row
+    job = _RUNNING.get(job_id)
+    if job is not None and job.alive():
+        status = 'running'
+    elif status in ('running', 'pending'):
+        status = 'interrupted'
+    return {'job_id': job_id, 'created': created, 'updated': updated, 'status': status,
+            'params': json.loads(params), 'total': total,
+            'done': counts.get(DONE, 0), 'failed': counts.get(FAILED, 0), 'pending': counts.get(PENDING, 0),
+            'error': job.error if job is not None else None}
+
+def job_results(job_id):
+    # 디스크에 기록된 완료 결과 (우선순위 순서)
+    con = _open_job_store()
+    try:
+        blobs = con.execute("SELECT result FROM scan_job_items WHERE job_id = ? AND state = ? ORDER BY seq",
+                            (job_id, DONE)).fetchall()
+    finally:
+        con.close()
+    return [pickle.loads(b) for b, in blobs]
+
+def list_jobs(limit=10):
+    con = _open_job_store()
+    try:
+        ids = [r[0] for r in con.execute("SELECT job_id FROM scan_jobs ORDER BY created DESC LIMIT ?", (limit,))]
+    finally:
+        con.close()
+    return [job_status(j) for j in ids]
+
+def delete_job(job_id):
+    cancel_job(job_id)
+    con = _open_job_store()
+    try:
+        with con:
+            con.execute("DELETE FROM scan_job_items WHERE job_id = ?", (job_id,))
+            con.execute("DELETE FROM scan_jobs WHERE job_id = ?", (job_id,))
+    finally:
+        con.close()
@@ -0,0 +1,1086 @@
+# ─────────────────────────────────────────────
+# 스캐너 엔진: 수집 · 저장 · 지표 · 점수 · 스캔 파이프라인
+#   Streamlit에 의존하지 않으므로 UI(stockfind.py), CLI(scan_cli.py),
+#   다른 배치 작업에서 그대로 import해서 쓴다.
+# ─────────────────────────────────────────────
+import requests
+import pandas as pd
+import numpy as np
+import time
+import re
+import os
+import random
+import sqlite3
+import pickle
+import hashlib
+import threading
+import queue
+import multiprocessing
+import datetime as dt
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from indicators import ICHIMOKU_PERIODS, SENKOU_SHIFT, daily_indicator_frame
+from indicator_state import STATE_VERSION, IndicatorState
+from panel import compute_universe
+from timeframes import MIN_PERIOD_BARS, frame_clouds
+from naver_tables import extract_market_sum, extract_price_table, extract_foreign_ratios
+from signals import (DAILY_CLOUD_SCORE, MOMENTUM_SCORE, WEEKLY_CLOUD_SCORE, cci_zone, cloud_state,
+                     ma_cross_code, score_signals)
+from http_cache import ResponseCache
+import metrics
+
+# ─────────────────────────────────────────────
+# 헬퍼 함수
+# ─────────────────────────────────────────────
+def get_headers():
+    return {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Referer': 'https://finance.naver.com/'
+    }
+
+# ─────────────────────────────────────────────
+# 공용 HTTP 수집 계층 (keep-alive 커넥션 풀 + 동시 요청 제한 + 요청 속도 제한/재시도)
+# ─────────────────────────────────────────────
+HTTP_POOL_SIZE = 32      # 호스트당 유지할 keep-alive 커넥션 수
+PAGE_WORKERS = 6         # 종목 1개당 동시에 요청하는 최대 페이지 수
+REQUEST_RATE = float(os.environ.get('STOCKFIND_RATE', '10'))   # 초당 최대 요청 수 (전 스레드 공용)
+MAX_RETRIES = 4          # 실패한 요청의 추가 시도 횟수
+BACKOFF_BASE = 0.5       # 재시도 대기 기준(초): base * 2^n 범위에서 무작위
+BACKOFF_MAX = 10.0
+# 수집 대상 주소. 리플레이 서버(benchmarks/replay.py) 등으로 바꿔 끼울 수 있다 (결과의 차트 링크는 그대로)
+NAVER_BASE_URL = os.environ.get('STOCKFIND_NAVER_URL', 'https://finance.naver.com').rstrip('/')
+FCHART_BASE_URL = os.environ.get('STOCKFIND_FCHART_URL', 'https://fchart.stock.naver.com').rstrip('/')
+THROTTLE_STATUSES = (429, 503)
+RETRY_STATUSES = THROTTLE_STATUSES + (500, 502, 504)
+
+class FetchError(Exception):
+    # 재시도를 모두 소진했거나 재시도해도 소용없는 응답(4xx)
+    def __init__(self, url, reason):
+        super().__init__(f"{reason}: {url}")
+        self.url = url
+        self.reason = reason
+
+class RateLimiter:
+    # 토큰 버킷. 제한(429/503)이나 타임아웃을 받으면 속도를 절반으로 낮추고,
+    # 성공이 이어지면 설정 속도까지 조금씩 되돌린다.
+    def __init__(self, rate, burst=None, min_rate=0.5):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(min_rate, self.max_rate)
+        self.burst = burst or max(1.0, self.max_rate)
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.max_rate = self.rate = float(rate)
+            self.min_rate = min(self.min_rate, self.max_rate)
+            self.burst = max(1.0, self.max_rate)
+            self.tokens = min(self.tokens, self.burst)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_s = (1 - self.tokens) / self.rate
+            time.sleep(wait_s)
+
+    def throttled(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.02)
+
+rate_limiter = RateLimiter(REQUEST_RATE)
+
+def set_request_rate(rate):
+    rate_limiter.set_rate(rate)
+
+_session = None
+_session_lock = threading.Lock()
+
+def set_base_urls(naver=None, fchart=None):
+    global NAVER_BASE_URL, FCHART_BASE_URL
+    if naver:
+        NAVER_BASE_URL = naver.rstrip('/')
+    if fchart:
+        FCHART_BASE_URL = fchart.rstrip('/')
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                s.mount('https://', adapter)
+                s.mount('http://', adapter)
+                s.headers.update(get_headers())
+                _session = s
+    return _session
+
+def _backoff(attempt, retry_after=None):
+    if retry_after is not None:
+        try:
+            return min(BACKOFF_MAX, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def _endpoint(url):
+    # 계측 라벨: 경로의 마지막 부분 (sise_day.naver, sise.nhn ...)
+    return urlsplit(url).path.rsplit('/', 1)[-1] or 'root'
+
+def fetch_response(url, timeout=10, retries=MAX_RETRIES, headers=None):
+    # 모든 요청은 공용 속도 제한을 거치고, 제한/타임아웃/5xx는 지수 백오프로 재시도한다
+    endpoint = _endpoint(url)
+    reason = retry_after = None
+    for attempt in range(retries + 1):
+        if attempt:
+            metrics.inc('http_retries_total', endpoint=endpoint)
+            time.sleep(_backoff(attempt - 1, retry_after))
+        retry_after = None
+        rate_limiter.acquire()
+        metrics.inc('http_requests_total', endpoint=endpoint)
+        try:
+            with metrics.timer('http'):
+                resp = get_session().get(url, timeout=timeout, headers=headers)
+        except requests.Timeout:
+            rate_limiter.throttled()
+            reason = "timeout"
+            metrics.inc('http_errors_total', endpoint=endpoint, reason=reason)
+            continue
+        except requests.ConnectionError as e:
+            rate_limiter.throttled()
+            reason = f"connection error ({e.__class__.__name__})"
+            metrics.inc('http_errors_total', endpoint=endpoint, reason='connection')
+            continue
+        metrics.inc('http_bytes_total', len(resp.content), endpoint=endpoint)
+        if resp.status_code in THROTTLE_STATUSES:
+            rate_limiter.throttled()
+            retry_after = resp.headers.get('Retry-After')
+        if resp.status_code >= 400:
+            metrics.inc('http_errors_total', endpoint=endpoint, reason=str(resp.status_code))
+        if resp.status_code in RETRY_STATUSES:
+            reason = f"HTTP {resp.status_code}"
+            continue
+        if resp.status_code >= 400:
+            raise FetchError(url, f"HTTP {resp.status_code}")
+        rate_limiter.succeeded()
+        return resp
+    metrics.inc('http_gave_up_total', endpoint=endpoint)
+    raise FetchError(url, reason)
+
+def fetch_bytes(url, timeout=10, retries=MAX_RETRIES):
+    # 디코딩은 추출기(naver_tables)가 euc-kr로 직접 처리
+    return fetch_response(url, timeout=timeout, retries=retries).content
+
+def fetch_text(url, timeout=10, encoding='euc-kr'):
+    return fetch_bytes(url, timeout=timeout).decode(encoding, errors='replace')
+
+def fetch_many(urls, timeout=10, max_workers=PAGE_WORKERS):
+    # urls 순서대로 원본 bytes를 반환, 재시도 후에도 실패한 페이지는 None
+    def _one(u):
+        try:
+            return fetch_bytes(u, timeout=timeout)
+        except FetchError:
+            return None
+    if max_workers <= 1 or len(urls) <= 1:
+        return [_one(u) for u in urls]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as ex:
+        return list(ex.map(_one, urls))
+
+def get_market_sum_pages(page_list, market="KOSPI"):
+    sosok = 0 if market == "KOSPI" else 1
+    codes, names, changes, failed = [], [], [], []
+    for page in page_list:
+        url = f"{NAVER_BASE_URL}/sise/sise_market_sum.naver?sosok={sosok}&page={page}"
+        try:
+            raw = fetch_cached(url, timeout=10)
+            with metrics.timer('parse'):
+                page_codes, page_names, page_changes = extract_market_sum(raw)
+        except (FetchError, ValueError):
+            failed.append(page)
+            continue
+        codes += page_codes
+        names += page_names
+        changes += page_changes
+    df = pd.DataFrame({'종목코드': codes, '종목명': names, '등락률': changes})
+    df.attrs['failed_pages'] = failed
+    return df
+
+# ─────────────────────────────────────────────
+# 로컬 시세 저장소 (SQLite, 종목별 증분 추가 — 일별시세 페이지 수집 봉만 저장)
+# ─────────────────────────────────────────────
+DATA_DIR = os.environ.get('STOCKFIND_DATA_DIR', '.stockfind')
+PRICE_STORE_PATH = os.path.join(DATA_DIR, 'prices.sqlite')
+PRICE_COLUMNS = ['날짜', '종가', '고가', '저가', '거래량']
+# 가격은 float32 (원 단위 가격은 1,677만 원까지 정확, NaN 표현 필요), 지표 계산 시에만 float64로 올린다
+# 거래량은 float64: 하루 1,677만 주(2^24)를 넘는 종목이 흔해 float32면 끝자리가 뭉개진다
+PRICE_DTYPES = {'날짜': 'datetime64[ns]', '종가': np.float32, '고가': np.float32, '저가': np.float32, '거래량': np.float64}
+
+def lean_prices(df=None):
+    # 쓰는 OHLCV 컬럼만 남기고 저장용 dtype으로 (None이면 빈 시세)
+    if df is None:
+        df = pd.DataFrame(columns=PRICE_COLUMNS)
+    return df[PRICE_COLUMNS].astype(PRICE_DTYPES)
+
+def _open_price_store():
+    os.makedirs(DATA_DIR, exist_ok=True)
+    con = sqlite3.connect(PRICE_STORE_PATH, timeout=30)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""CREATE TABLE IF NOT EXISTS prices (
+                       code TEXT NOT NULL, date TEXT NOT NULL,
+                       close REAL, high REAL, low REAL, volume REAL,
+                       PRIMARY KEY (code, date))""")
+    con.execute("""CREATE TABLE IF NOT EXISTS indicator_state (
+                       code TEXT PRIMARY KEY, version INTEGER, blob BLOB)""")
+    con.execute("""CREATE TABLE IF NOT EXISTS foreign_ratios (
+                       market TEXT NOT NULL, day TEXT NOT NULL, code TEXT NOT NULL, ratio REAL,
+                       PRIMARY KEY (market, day, code))""")
+    con.execute("""CREATE TABLE IF NOT EXISTS foreign_snapshots (
+                       market TEXT NOT NULL, day TEXT NOT NULL, complete INTEGER,
+                       PRIMARY KEY (market, day))""")
+    con.execute("""CREATE TABLE IF NOT EXISTS result_memo (
+                       code TEXT NOT NULL, bar_date TEXT NOT NULL, params TEXT NOT NULL,
+                       bar TEXT, row BLOB, used REAL,
+                       PRIMARY KEY (code, bar_date, params))""")
+    con.execute("CREATE INDEX IF NOT EXISTS result_memo_used ON result_memo (used)")
+    return con
+
+# ─────────────────────────────────────────────
+# HTTP 응답 캐시 (시가총액 / 외국인 보유 페이지, 세션·프로세스 간 공유)
+# ─────────────────────────────────────────────
+HTTP_CACHE_PATH = os.path.join(DATA_DIR, 'http_cache.sqlite')
+# URL에 포함된 엔드포인트 -> 유효 시간(초). 목록에 없는 URL은 캐시하지 않는다
+CACHE_TTLS = {
+    'sise_market_sum': 60,
+    'sise_foreign_hold': 30 * 60,
+}
+
+_response_cache = None
+_flight_locks = {}
+_flight_guard = threading.Lock()
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        with _flight_guard:
+            if _response_cache is None:
+                os.makedirs(DATA_DIR, exist_ok=True)
+                _response_cache = ResponseCache(HTTP_CACHE_PATH)
+    return _response_cache
+
+def cache_ttl(url):
+    for endpoint, ttl in CACHE_TTLS.items():
+        if endpoint in url:
+            return ttl
+    return None
+
+def fetch_cached(url, timeout=10):
+    # TTL 안이면 캐시 본문, 지나면 ETag/Last-Modified로 조건부 재요청 (304면 본문 재사용)
+    ttl = cache_ttl(url)
+    if ttl is None:
+        return fetch_bytes(url, timeout=timeout)
+    cache = get_response_cache()
+    entry = cache.get(url)
+    if entry is not None and time.time() - entry['stored_at'] < ttl:
+        return entry['body']
+    # 같은 URL을 여러 세션이 동시에 요청하면 한 번만 받고 나머지는 그 결과를 쓴다
+    with _flight_guard:
+        lock = _flight_locks.setdefault(url, threading.Lock())
+    with lock:
+        entry = cache.get(url)
+        if entry is not None and time.time() - entry['stored_at'] < ttl:
+            return entry['body']
+        headers = {}
+        if entry is not None and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        resp = fetch_response(url, timeout=timeout, headers=headers or None)
+        if resp.status_code == 304 and entry is not None:
+            return cache.touch(url, entry)['body']
+        return cache.put(url, resp.content, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))['body']
+
+def load_stored_prices(code):
+    try:
+        con = _open_price_store()
+        try:
+            rows = con.execute("SELECT date, close, high, low, volume FROM prices "
+                               "WHERE code = ? ORDER BY date", (code,)).fetchall()
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return lean_prices()
+    df = pd.DataFrame(rows, columns=PRICE_COLUMNS)
+    df['날짜'] = pd.to_datetime(df['날짜'])
+    return lean_prices(df)
+
+def save_prices(code, df, replace=False):
+    if df is None or df.empty:
+        return
+    rows = list(zip([code] * len(df), df['날짜'].dt.strftime('%Y-%m-%d'),
+                    df['종가'].astype(float), df['고가'].astype(float),
+                    df['저가'].astype(float), df['거래량'].astype(float)))
+    try:
+        con = _open_price_store()
+        try:
+            with con:
+                if replace:
+                    con.execute("DELETE FROM prices WHERE code = ?", (code,))
+                con.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            con.close()
+    except sqlite3.Error:
+        pass
+
+def load_indicator_state(code):
+    try:
+        con = _open_price_store()
+        try:
+            row = con.execute("SELECT version, blob FROM indicator_state WHERE code = ?", (code,)).fetchone()
+        finally:
+            con.close()
+        if row is None or row[0] != STATE_VERSION:
+            return None
+        return pickle.loads(row[1])
+    except Exception:
+        return None
+
+def save_indicator_state(code, state):
+    try:
+        con = _open_price_store()
+        try:
+            with con:
+                con.execute("INSERT OR REPLACE INTO indicator_state VALUES (?, ?, ?)",
+                            (code, STATE_VERSION, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)))
+        finally:
+            con.close()
+    except sqlite3.Error:
+        pass
+
+def reset_derived_state(code):
+    # 시세 이력이 통째로 바뀐 종목(분할/병합, 수정주가)의 지표 상태와 결과 메모를 지운다
+    try:
+        con = _open_price_store()
+        try:
+            with con:
+                con.execute("DELETE FROM indicator_state WHERE code = ?", (code,))
+                con.execute("DELETE FROM result_memo WHERE code = ?", (code,))
+        finally:
+            con.close()
+    except sqlite3.Error:
+        pass
+
+def advance_indicator_state(code, df_price):
+    # 저장된 상태가 이 시세 이력으로 만든 것이면(최근 봉 대조) 마지막 날짜부터만 반영,
+    # 아니면(빈 구간 복구, 수정주가, 오래된 상태) 전체 이력으로 새로 만든다
+    state = load_indicator_state(code)
+    if state is not None and state.last_date is not None and state.matches(df_price):
+        state.extend(df_price[df_price['날짜'] >= state.last_date])
+    else:
+        state = IndicatorState.from_frame(df_price)
+    save_indicator_state(code, state)
+    return state
+
+def _merge_price_frames(dfs):
+    dfs = [d for d in dfs if not d.empty]
+    if not dfs:
+        return lean_prices()
+    df = pd.concat(dfs, ignore_index=True).dropna(subset=['날짜', '종가'])
+    return lean_prices(df.drop_duplicates('날짜', keep='first').sort_values('날짜').reset_index(drop=True))
+
+# ─────────────────────────────────────────────
+# 페이지 수집 계획 (필요 최소 페이지 + 조기 종료)
+# ─────────────────────────────────────────────
+ROWS_PER_PRICE_PAGE = 10
+
+def plan_price_pages(min_daily_bars=None, min_weekly_bars=None, days_per_week=5):
+    # analyze_stock 기준: 일봉 df_final 6행, 주봉 df_w_final 5행이 남아야 함
+    lookback = max(ICHIMOKU_PERIODS) + SENKOU_SHIFT - 1
+    if min_daily_bars is None:
+        min_daily_bars = lookback + 6
+    if min_weekly_bars is None:
+        min_weekly_bars = lookback + 5
+    days = max(min_daily_bars, min_weekly_bars * days_per_week)
+    # 진행 중인 주(부분 주봉) 몫으로 1페이지 여유
+    return -(-days // ROWS_PER_PRICE_PAGE) + 1
+
+MIN_PRICE_PAGES = plan_price_pages()   # 42페이지 (약 420거래일, 84주)
+
+def _fetch_price_pages(code, max_pages, stop_date=None):
+    # 최신 페이지부터 배치 단위로 수집하고, 다음 경우 더 이상 요청하지 않는다
+    #   - 페이지가 새 날짜를 하나도 추가하지 못함 (상장 초기 종목의 마지막 페이지 반복)
+    #   - 페이지의 가장 오래된 날짜가 stop_date 이하 (저장소와 이어짐)
+    #   - '맨뒤' 링크로 확인한 실제 마지막 페이지를 넘어섬
+    #   - 재시도 후에도 받지 못한 페이지 (그 뒤 페이지를 붙이면 중간이 빈 시세가 되므로 중단)
+    url = f"{NAVER_BASE_URL}/item/sise_day.naver?code={code}"
+    dfs, seen = [], set()
+    pages_used, page, reached, done, failed = 0, 1, False, False, False
+    # 증분 수집은 1페이지로 시작해 배치를 두 배씩 늘린다
+    batch = 1 if stop_date is not None else PAGE_WORKERS
+    while page <= max_pages and not done:
+        batch_pages = list(range(page, min(page + batch, max_pages + 1)))
+        raws = fetch_many([f"{url}&page={p}" for p in batch_pages], timeout=10)
+        pages_used += len(batch_pages)
+        for p, raw in zip(batch_pages, raws):
+            try:
+                with metrics.timer('parse'):
+                    columns, last = extract_price_table(raw) if raw is not None else (None, None)
+            except ValueError:
+                columns = None
+            if not columns or not len(columns['날짜']):
+                metrics.fail(code, 'fetch', f"일별시세 {p}페이지 " + ("수집 실패" if raw is None else "파싱 실패"))
+                failed = done = True
+                break
+            if p == 1 and last:
+                max_pages = min(max_pages, last)
+            page_df = pd.DataFrame(columns).sort_values('날짜')
+            new_dates = set(page_df['날짜']) - seen
+            if not new_dates:
+                done = True
+                break
+            seen |= new_dates
+            dfs.append(page_df)
+            if stop_date is not None and page_df['날짜'].iloc[0] <= stop_date:
+                reached = done = True
+                break
+        page = batch_pages[-1] + 1
+        batch = min(batch * 2, PAGE_WORKERS)
+    df = _merge_price_frames(dfs)
+    df.attrs['pages_used'] = pages_used
+    df.attrs['reached_stop'] = reached
+    df.attrs['failed'] = failed
+    return df
+
+def _history_revised(fresh, stored):
+    # 새로 받은 봉과 저장된 봉이 겹치는 날짜에서 종가/거래량이 다르면 True (분할/병합, 수정주가)
+    # 저장분 마지막 봉은 장중에 저장됐을 수 있으므로 그보다 앞의 겹치는 봉이 있으면 그것으로 비교
+    both = fresh.merge(stored, on='날짜', suffixes=('', '_stored'))
+    if both.empty:
+        return False
+    older = both[both['날짜'] < stored['날짜'].iloc[-1]]
+    row = (older if not older.empty else both).iloc[-1]
+    return row['종가'] != row['종가_stored'] or row['거래량'] != row['거래량_stored']
+
+def get_price_data(code, max_pages=MIN_PRICE_PAGES, use_store=True):
+    # attrs['stale']: 최신 봉을 받지 못해 저장된 시세만으로 돌려준 경우 True
+    stored = load_stored_prices(code) if use_store else lean_prices()
+    stale = False
+    if stored.empty:
+        df = _fetch_price_pages(code, max_pages)
+        pages_used = df.attrs['pages_used']
+        # 중간에 끊긴 시세는 저장하지 않음 (짧은 이력이 저장되면 증분 수집이 채우지 못함)
+        if use_store and not df.attrs['failed']:
+            save_prices(code, df, replace=True)
+    else:
+        # 저장된 마지막 날짜에 닿을 때까지만 최신 페이지부터 수집 (평소엔 1페이지)
+        fresh = _fetch_price_pages(code, max_pages, stop_date=stored['날짜'].iloc[-1])
+        pages_used = fresh.attrs['pages_used']
+        if fresh.attrs['failed'] and not fresh.attrs['reached_stop']:
+            # 수집이 중간에 끊김: 받은 봉과 저장분 사이가 비므로 붙이지 않고 저장된 시세만 쓴다
+            # (저장소는 그대로 두고 다음 스캔에서 다시 수집, 결과는 저장분 기준이라 stale로 표시)
+            metrics.fail(code, 'fetch', f"증분 수집 중단: {stored['날짜'].iloc[-1]:%Y-%m-%d}까지 저장된 시세로 계산")
+            df = stored
+            stale = True
+        elif fresh.attrs['reached_stop'] and _history_revised(fresh, stored):
+            # 저장된 과거 봉이 새 기준과 다름: 전체 이력을 다시 받고 그 이력으로 만든 상태/메모를 지운다
+            metrics.inc('price_history_reloads_total')
+            reset_derived_state(code)
+            df = _fetch_price_pages(code, max_pages)
+            pages_used += df.attrs['pages_used']
+            if not df.attrs['failed']:
+                save_prices(code, df, replace=True)
+        elif fresh.attrs['reached_stop']:
+            # 같은 날짜는 새로 받은 값(장중 갱신분)을 우선
+            df = pd.concat([fresh, stored], ignore_index=True)
+            df = df.drop_duplicates('날짜', keep='first').sort_values('날짜').reset_index(drop=True)
+            save_prices(code, fresh)
+        else:
+            # 저장분과 이어지지 않으면(장기 미갱신) 새로 받은 전체로 교체
+            df = fresh
+            save_prices(code, df, replace=True)
+    df = df.tail(max_pages * ROWS_PER_PRICE_PAGE).reset_index(drop=True)
+    df.attrs = {'pages_used': pages_used, 'stale': stale}
+    return df
+
+# ─────────────────────────────────────────────
+# 시세 소스 (페이지 수집 / fchart 일괄 요청)
+# ─────────────────────────────────────────────
+def fetch_fchart_bars(code, timeframe='day', count=600):
+    # fchart 응답: <item data="날짜|시가|고가|저가|종가|거래량" />
+    url = (f"{FCHART_BASE_URL}/sise.nhn?symbol={code}"
+           f"&timeframe={timeframe}&count={count}&requestType=0")
+    text = fetch_text(url, timeout=10)
+    with metrics.timer('parse'):
+        rows = [d.split('|') for d in re.findall(r'<item data="([^"]+)"', text)]
+    if not rows:
+        return lean_prices()
+    df = pd.DataFrame(rows, columns=['날짜', '시가', '고가', '저가', '종가', '거래량'])
+    for col in ['종가', '고가', '저가', '거래량']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['날짜'] = pd.to_datetime(df['날짜'], format='%Y%m%d', errors='coerce')
+    return lean_prices(df.dropna(subset=['날짜', '종가']).sort_values('날짜').reset_index(drop=True))
+
+def _html_source(code, max_pages, use_store=True):
+    return get_price_data(code, max_pages=max_pages, use_store=use_store), None
+
+def _fchart_source(code, max_pages, use_store=True):
+    # 한 번에 전체 구간을 받으므로 시세 저장소를 쓰지 않는다 (use_store는 로더 형식을 맞추려는 인자)
+    # 저장소는 페이지 수집 봉 전용: 다른 소스 봉이 섞이면 값 차이로 _history_revised가 전체 재수집을 일으킨다
+    daily = fetch_fchart_bars(code, 'day', max_pages * 10)
+    if daily.empty:
+        return daily, None
+    # 월봉은 일봉 기간으로는 일목 판정에 모자라므로 소스 봉을 같이 받는다 (요청당 봉 수가 적어 부담 작음)
+    native = {tf: fetch_fchart_bars(code, timeframe, max_pages * 2)
+              for tf, timeframe in (('W', 'week'), ('M', 'month'))}
+    native = {tf: df for tf, df in native.items() if not df.empty}
+    return daily, (native or None)
+
+# 소스 이름 -> (표시명, 로더). 로더는 (일봉, {시간축: 소스 주/월봉} 또는 None)을 반환하며
+# 소스 봉이 없는 시간축은 일봉을 집계한다 (timeframes). use_store=False면 시세 저장소를 거치지 않고
+# max_pages만큼 전부 새로 받는다 (저장분보다 긴 이력이 필요한 백테스트).
+PRICE_SOURCES = {
+    'naver_html': ("네이버 일별시세 (페이지 수집)", _html_source),
+    'fchart':     ("네이버 차트 (일괄 요청, 일/주/월봉)", _fchart_source),
+}
+DEFAULT_PRICE_SOURCE = 'naver_html'
+
+def load_price_frames(code, source=DEFAULT_PRICE_SOURCE, max_pages=MIN_PRICE_PAGES, use_store=True):
+    _, loader = PRICE_SOURCES.get(source, PRICE_SOURCES[DEFAULT_PRICE_SOURCE])
+    try:
+        daily, native = loader(code, max_pages, use_store=use_store)
+    except Exception as e:
+        metrics.fail(code, 'fetch', f"{source}: {e.__class__.__name__}: {e}")
+        daily, native = None, None
+    if (daily is None or daily.empty) and source != DEFAULT_PRICE_SOURCE:
+        # 일괄 소스 실패 시 페이지 수집 방식으로 대체
+        return load_price_frames(code, DEFAULT_PRICE_SOURCE, max_pages, use_store=use_store)
+    return daily, native
+
+# ─────────────────────────────────────────────
+# 정규장 마감 기준 (한국 시간, 실행 기계의 시간대와 무관)
+# ─────────────────────────────────────────────
+MARKET_TZ = ZoneInfo('Asia/Seoul')
+MARKET_CLOSE = dt.time(15, 30)      # 정규장 마감 (이후 일봉/등락률이 확정)
+
+def last_close(now=None):
+    # 가장 최근 정규장 마감 시각 (epoch 초). 주말은 건너뛰고 공휴일은 고려하지 않는다
+    # (공휴일에는 전 거래일 결과가 오래된 것으로 보여 실시간으로 다시 받는다)
+    now = dt.datetime.fromtimestamp(time.time() if now is None else now, MARKET_TZ)
+    day = now.date() if now.time() >= MARKET_CLOSE else now.date() - dt.timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= dt.timedelta(days=1)
+    return dt.datetime.combine(day, MARKET_CLOSE, MARKET_TZ).timestamp()
+
+# ─────────────────────────────────────────────
+# 외국인 지분율 (병렬 · 백그라운드 수집, 장 마감일별 스냅샷)
+# ─────────────────────────────────────────────
+FOREIGN_WORKERS = PAGE_WORKERS    # 동시에 요청하는 sise_foreign_hold 페이지 수
+
+class ForeignRatios:
+    # 백그라운드로 채워지는 {종목코드: 지분율}. get()은 해당 종목이 들어오거나 수집이 끝날 때까지 기다린다
+    def __init__(self, codes=None):
+        self.ratios = {}
+        self.pending = set(codes) if codes is not None else None
+        self.finished = False
+        self._cond = threading.Condition()
+
+    def add(self, ratios):
+        with self._cond:
+            self.ratios.update(ratios)
+            if self.pending is not None:
+                self.pending.difference_update(ratios)
+            self._cond.notify_all()
+
+    def resolved(self):
+        # 요청 종목이 모두 채워졌는지 (대상 종목을 지정하지 않았으면 항상 False)
+        with self._cond:
+            return self.pending is not None and not self.pending
+
+    def finish(self):
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def get(self, code, default=None):
+        with self._cond:
+            while code not in self.ratios and not self.finished:
+                self._cond.wait()
+            return self.ratios.get(code, default)
+
+    def wait(self):
+        with self._cond:
+            while not self.finished:
+                self._cond.wait()
+            return dict(self.ratios)
+
+    def __len__(self):
+        with self._cond:
+            return len(self.ratios)
+
+def _snapshot_day():
+    # 스냅샷 날짜 = 마지막 정규장 마감일 (KST). 마감 전에 받은 스냅샷은 마감이 지나면 지난 날짜가 되어 다시 받는다
+    return dt.datetime.fromtimestamp(last_close(), MARKET_TZ).strftime('%Y-%m-%d')
+
+def load_foreign_snapshot(market, day=None):
+    # 반환: ({종목코드: 지분율}, 전체 페이지를 다 받은 스냅샷인지)
+    day = day or _snapshot_day()
+    try:
+        con = _open_price_store()
+        try:
+            rows = con.execute("SELECT code, ratio FROM foreign_ratios WHERE market = ? AND day = ?",
+                               (market, day)).fetchall()
+            meta = con.execute("SELECT complete FROM foreign_snapshots WHERE market = ? AND day = ?",
+                               (market, day)).fetchone()
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return {}, False
+    return dict(rows), bool(meta and meta[0])
+
+def save_foreign_snapshot(market, ratios, complete, day=None):
+    day = day or _snapshot_day()
+    try:
+        con = _open_price_store()
+        try:
+            with con:
+                con.executemany("INSERT OR REPLACE INTO foreign_ratios VALUES (?, ?, ?, ?)",
+                                [(market, day, code, ratio) for code, ratio in ratios.items()])
+                con.execute("INSERT INTO foreign_snapshots VALUES (?, ?, ?) "
+                            "ON CONFLICT(market, day) DO UPDATE SET complete = MAX(complete, excluded.complete)",
+                            (market, day, int(complete)))
+                # 지난 날짜 스냅샷은 정리
+                con.execute("DELETE FROM foreign_ratios WHERE market = ? AND day < ?", (market, day))
+                con.execute("DELETE FROM foreign_snapshots WHERE market = ? AND day < ?", (market, day))
+        finally:
+            con.close()
+    except sqlite3.Error:
+        pass
+
+def _crawl_foreign_ratios(result, market, max_pages):
+    try:
+        snapshot, complete = load_foreign_snapshot(market)
+        result.add(snapshot)
+        if complete or result.resolved():
+            return
+        sosok = "0" if market == "KOSPI" else "1"
+        base_url = f"{NAVER_BASE_URL}/sise/sise_foreign_hold.naver?sosok={sosok}"
+
+        def _page(page):
+            try:
+                return _parse_foreign_page(fetch_cached(f"{base_url}&page={page}", timeout=8))
+            except (FetchError, ValueError):
+                return None
+
+        first = _page(1)
+        if first is None:
+            return
+        ratios, last = first
+        result.add(ratios)
+        total_pages = min(last or max_pages, max_pages)
+        fetched, failed, page = dict(ratios), False, 2
+        with ThreadPoolExecutor(max_workers=FOREIGN_WORKERS) as pool:
+            # 배치마다 대상 종목이 모두 채워졌는지 확인하고 남은 페이지는 건너뛴다
+            while page <= total_pages and not result.resolved():
+                batch = range(page, min(page + FOREIGN_WORKERS, total_pages + 1))
+                for parsed in pool.map(_page, batch):
+                    if parsed is None:
+                        failed = True
+                        continue
+                    result.add(parsed[0])
+                    fetched.update(parsed[0])
+                page = batch[-1] + 1
+        save_foreign_snapshot(market, fetched, complete=page > total_pages and not failed)
+    finally:
+        result.finish()
+
+def start_foreign_ratio_loader(market="KOSPI", codes=None, max_pages=40):
+    # 백그라운드 스레드로 수집을 시작하고 바로 ForeignRatios를 반환 (시세 수집과 겹쳐 진행)
+    # codes를 주면 그 종목들이 모두 확인되는 즉시 나머지 페이지 수집을 멈춘다
+    result = ForeignRatios(codes)
+    threading.Thread(target=_crawl_foreign_ratios, args=(result, market, max_pages), daemon=True).start()
+    return result
+
+def load_foreign_ratio_all(market="KOSPI", max_pages=40, codes=None):
+    return start_foreign_ratio_loader(market, codes, max_pages).wait()
+
+def _parse_foreign_page(raw):
+    with metrics.timer('parse'):
+        return extract_foreign_ratios(raw)
+
+# ─────────────────────────────────────────────
+# 점수 기반 신호 결정 (주봉 일목 도입 및 수정)
+# ─────────────────────────────────────────────
+def calc_signal_score(last, prev, d_cloud, w_cloud):
+    # 종목 1개: 최근 2봉과 일/주봉 구름대 코드 (월봉 구름대는 표시만 하고 점수에는 넣지 않는다) → (총점, 신호 코드, 점수 내역)
+    # 여러 종목을 한꺼번에 계산할 때는 signals.score_signals에 배열로 넘긴다 (analyze_batch)
+    score, signal, detail = score_signals(d_cloud, w_cloud, last['MACD_hist'], prev['MACD_hist'],
+                                          last['CCI'], prev['CCI'], last['종가'], last['20MA'])
+    return int(score[0]), int(signal[0]), {k: int(v[0]) for k, v in detail.items()}
+
+# ─────────────────────────────────────────────
+# 종목 분석 메인 (주봉 일목 분석 모듈 신설)
+# ─────────────────────────────────────────────
+def analyze_stock(code, name, current_change, foreign_dict=None, fetch_investor=True,
+                  price_source=DEFAULT_PRICE_SOURCE):
+    try:
+        # 데이터 수집 (주봉 일목 연산에 필요한 최소 페이지만 확보)
+        df_price, native = load_price_frames(code, price_source, max_pages=MIN_PRICE_PAGES)
+    except Exception:
+        return None
+    foreign_ratio = foreign_dict.get(code, 0.0) if fetch_investor and foreign_dict is not None else None
+    return analyze_price(code, name, current_change, df_price, native, foreign_ratio)
+
+def build_result(code, name, current_change, last, prev, d_cloud, w_cloud, m_cloud,
+                 foreign_ratio=None, scored=None):
+    # d_cloud / w_cloud / m_cloud: 구름대 코드, scored: 배치로 미리 계산한 (총점, 신호 코드)
+    # 표시 문자열은 만들지 않고 숫자/코드만 담는다 (result_format.format_frame에서 렌더링 시점에 변환)
+    disparity = ((last['종가'] / last['20MA']) - 1) * 100 if last['20MA'] > 0 else 0
+
+    # --- 점수 및 최종 신호 계산 ---
+    if scored is None:
+        with metrics.timer('score'):
+            scored = calc_signal_score(last, prev, d_cloud, w_cloud)[:2]
+    score, signal = scored
+
+    # COLUMNS 순서
+    return (
+        code, name, float(current_change),
+        int(last['종가']), float(disparity),
+        int(score), int(signal),
+        int(d_cloud), int(w_cloud), int(m_cloud), ma_cross_code(last, prev),
+        float(last['CCI']), int(cci_zone(last['CCI'], prev['CCI'])), float(last['vol_ratio']),
+        float(foreign_ratio) if foreign_ratio is not None else np.nan,
+    )
+
+def analyze_price(code, name, current_change, df_price, native=None, foreign_ratio=None):
+    # 수집이 끝난 시세만으로 지표/신호 계산 (네트워크 없음, 프로세스 풀에서 실행 가능)
+    try:
+        if df_price is None or len(df_price) < 80:
+            metrics.fail(code, 'analyze', f"일봉 부족 ({0 if df_price is None else len(df_price)}개 < 80)")
+            return None
+        
+        # ─── 1. 일봉 지표 및 일봉 일목 구름대 ───
+        with metrics.timer('indicators'):
+            df_final = daily_indicator_frame(df_price)
+        if len(df_final) < 6:
+            metrics.fail(code, 'analyze', "유효 지표 봉 부족")
+            return None
+        
+        rows = [df_final.iloc[-k] for k in range(1, 6)]
+        d_cloud = cloud_state(rows)
+            
+        # ─── 2. 주봉 / 월봉 일목 구름대 (봉 52개 + 진행 중 1개 미만이면 데이터부족) ───
+        with metrics.timer('weekly'):
+            clouds = frame_clouds([df_price], [native])
+
+        return build_result(code, name, current_change, rows[0], rows[1],
+                            d_cloud, clouds['W'][0], clouds['M'][0], foreign_ratio)
+    except Exception as e:
+        metrics.fail(code, 'analyze', f"{e.__class__.__name__}: {e}")
+        return None
+
+def _tail_usable(code, tail):
+    if tail['daily'] is None or tail.get('n_daily', 80) < 80:
+        metrics.fail(code, 'analyze', "일봉 부족")
+        return False
+    return True
+
+def result_from_tail(code, name, current_change, tail, foreign_ratio=None, scored=None):
+    # tail: panel.compute_universe / IndicatorState.tail()이 주는 최근 5봉 요약
+    if not _tail_usable(code, tail):
+        return None
+    try:
+        clouds = tail['clouds']
+        return build_result(code, name, current_change, tail['daily'][0], tail['daily'][1],
+                            clouds['D'], clouds['W'], clouds['M'], foreign_ratio, scored)
+    except Exception as e:
+        metrics.fail(code, 'analyze', f"{e.__class__.__name__}: {e}")
+        return None
+
+def analyze_batch(items):
+    # items: (코드, 종목명, 등락률, 일봉, 소스 주/월봉 또는 None, 외국인 지분율) 목록
+    # 모든 종목을 날짜 × 종목 배열로 정렬해 지표별로 한 번에 계산 (panel.compute_universe)
+    items = list(items)
+    with metrics.timer('indicators'):
+        tails = compute_universe([it[3] for it in items], [it[4] for it in items])
+    # 점수/신호도 종목 전체를 배열 한 번으로
+    ok = [i for i, (it, tail) in enumerate(zip(items, tails)) if _tail_usable(it[0], tail)]
+    scored = {}
+    if ok:
+        with metrics.timer('score'):
+            clouds = np.array([(tails[i]['clouds']['D'], tails[i]['clouds']['W']) for i in ok],
+                              dtype=np.int64).reshape(-1, 2)
+            last = [tails[i]['daily'][0] for i in ok]
+            prev = [tails[i]['daily'][1] for i in ok]
+            col = lambda rows, f: np.array([r[f] for r in rows], dtype=np.float64)
+            score, signal, _ = score_signals(clouds[:, 0], clouds[:, 1],
+                                             col(last, 'MACD_hist'), col(prev, 'MACD_hist'),
+                                             col(last, 'CCI'), col(prev, 'CCI'), col(last, '종가'), col(last, '20MA'))
+        scored = {i: (int(s), int(g)) for i, s, g in zip(ok, score, signal)}
+    return [result_from_tail(code, name, change, tails[i], ratio, scored[i]) if i in scored else None
+            for i, (code, name, change, _, _, ratio) in enumerate(items)]
+
+def analyze_incremental(code, name, current_change, df_price, native=None, foreign_ratio=None):
+    # 저장된 지표 상태에 새 봉만 반영해 계산 (소스 주/월봉을 쓰는 경우는 전체 계산)
+    if native:
+        return analyze_price(code, name, current_change, df_price, native, foreign_ratio)
+    try:
+        if df_price is None or len(df_price) < 80:
+            metrics.fail(code, 'analyze', f"일봉 부족 ({0 if df_price is None else len(df_price)}개 < 80)")
+            return None
+        with metrics.timer('indicators'):
+            state = advance_indicator_state(code, df_price)
+            tail = state.tail()
+        return result_from_tail(code, name, current_change, tail, foreign_ratio)
+    except Exception as e:
+        metrics.fail(code, 'analyze', f"{e.__class__.__name__}: {e}")
+        return None
+
+# ─────────────────────────────────────────────
+# 스캔 엔진 (수집 스레드 풀 → 제한 큐 → 연산 프로세스 풀)
+# ─────────────────────────────────────────────
+FETCH_WORKERS = 3                               # 동시에 시세를 수집하는 종목 수
+COMPUTE_WORKERS = min(4, os.cpu_count() or 1)   # 지표/점수 연산 프로세스 수 (0이면 메인 스레드)
+
+_SCAN_DONE = object()
+
+def _analyze_job(job):
+    incremental, args = job
+    return analyze_incremental(*args) if incremental else analyze_price(*args)
+
+def _analyze_job_remote(job):
+    # 연산 프로세스에서 실행: 이 작업에서 잰 계측값을 결과와 함께 돌려준다
+    metrics.REGISTRY.reset()
+    res = _analyze_job(job)
+    return res, metrics.REGISTRY.snapshot()
+
+def _counted(res):
+    metrics.inc('stocks_scanned_total', result='ok' if res else 'failed')
+    return res
+
+# 수집 스레드가 잠금(metrics 레지스트리, SQLite 등)을 쥔 순간 fork된 연산 프로세스는 그 잠금에서 영영 멈춘다.
+# fork가 기본인 플랫폼에서는 스레드 없는 forkserver에서 띄운다 (이 모듈을 미리 import해 두어 시작이 빠르다)
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    _POOL_CONTEXT = multiprocessing.get_context('forkserver')
+    _POOL_CONTEXT.set_forkserver_preload([__name__])
+else:
+    _POOL_CONTEXT = None
+
+def _compute_pool(workers):
+    if workers <= 0:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=_POOL_CONTEXT)
+
+def iter_scan(rows, foreign_dict=None, fetch_investor=True, price_source=DEFAULT_PRICE_SOURCE,
+              fetch_workers=FETCH_WORKERS, compute_workers=COMPUTE_WORKERS, queue_size=None,
+              incremental=True, memo=True):
+    # rows: (종목코드, 종목명, 등락률) 목록. 끝나는 순서대로 (완료 수, row, 결과 또는 None)을 낸다
+    # memo: 마지막 봉이 그대로인 종목은 결과 메모에서 바로 내고 연산을 건너뛴다
+    rows = list(rows)
+    queue_size = queue_size or max(2, fetch_workers * 2)
+    fetched = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item):
+        # 연산 단계가 밀리면 여기서 대기 → 수집 단계 backpressure
+        while not stop.is_set():
+            try:
+                fetched.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def fetch_one(row):
+        if stop.is_set():
+            return
+        try:
+            frames = load_price_frames(row[0], price_source, max_pages=MIN_PRICE_PAGES)
+        except Exception as e:
+            metrics.fail(row[0], 'fetch', f"{e.__class__.__name__}: {e}")
+            frames = (None, None)
+        key = memo_key(*frames, source=price_source) if memo else None
+        put((row, frames, key, load_result_memo(row[0], key) if key else None))
+
+    def fetch_stage():
+        with ThreadPoolExecutor(max_workers=max(1, fetch_workers)) as pool:
+            list(pool.map(fetch_one, rows))
+        put(_SCAN_DONE)
+
+    pool = _compute_pool(compute_workers)
+    in_flight = max(1, compute_workers) * 2
+    threading.Thread(target=fetch_stage, daemon=True).start()
+    pending, done, fetch_finished = {}, 0, False
+    try:
+        while not fetch_finished or pending:
+            while not fetch_finished and len(pending) < in_flight:
+                try:
+                    item = fetched.get(timeout=0.05 if pending else 0.5)
+                except queue.Empty:
+                    break
+                if item is _SCAN_DONE:
+                    fetch_finished = True
+                    break
+                row, (df_price, native), key, cached = item
+                ratio = foreign_dict.get(row[0], 0.0) if fetch_investor and foreign_dict is not None else None
+                args = (incremental, (row[0], row[1], row[2], df_price, native, ratio))
+                if df_price is None or df_price.empty:
+                    metrics.fail(row[0], 'fetch', "시세 없음")
+                    done += 1
+                    yield done, row, _counted(None)
+                elif cached is not None:
+                    done += 1
+                    yield done, row, _counted(rebind_result(cached, row, ratio))
+                elif pool is None:
+                    done += 1
+                    yield done, row, _counted(_memoized(row, key, _analyze_job(args)))
+                else:
+                    pending[pool.submit(_analyze_job_remote, args)] = (row, key)
+            if pending:
+                finished, _ = wait(list(pending), timeout=0.05, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    row, key = pending.pop(fut)
+                    try:
+                        res, snap = fut.result()
+                        metrics.REGISTRY.merge(snap)
+                    except Exception as e:
+                        metrics.fail(row[0], 'analyze', f"{e.__class__.__name__}: {e}")
+                        res = None
+                    done += 1
+                    yield done, row, _counted(_memoized(row, key, res))
+    finally:
+        stop.set()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if memo:
+            prune_result_memo()
+
+# ─────────────────────────────────────────────
+# 결과 컬럼 (analyze_* 가 반환하는 행 순서)
+#   숫자/코드만 담은 튜플 → result_frame으로 타입 지정 DataFrame (세션당 수천 행 보관)
+#   표시 문자열은 result_format.format_frame에서 보이는 행만
+# ─────────────────────────────────────────────
+COLUMN_DTYPES = {
+    '코드': object,
+    '종목명': object,
+    '등락률': np.float32,
+    '현재가': np.int32,
+    '이격률': np.float32,
+    '총점': np.int16,
+    '신호': np.int8,          # signals.Signal
+    '일목(일봉)': np.int16,   # signals.cloud_code
+    '일목(주봉)': np.int16,
+    '일목(월봉)': np.int16,
+    'MA크로스': np.uint8,     # signals.ma_cross_code
+    'CCI': np.float32,
+    'CCI상태': np.int8,       # signals.CciZone
+    '거래량': np.float32,     # 거래량 배수 (NaN = 평균 없음)
+    '외국인지분율': np.float32,  # NaN = 미수집
+}
+COLUMNS = list(COLUMN_DTYPES)
+
+def result_frame(rows):
+    return pd.DataFrame.from_records(list(rows), columns=COLUMNS).astype(COLUMN_DTYPES)
+
+# ─────────────────────────────────────────────
+# 결과 메모 (종목코드, 마지막 봉 날짜, 계산 파라미터 해시 + 시세 소스) → 결과 행
+#   - 소스마다 봉 값과 주/월봉 출처가 달라(fchart 소스 봉 vs 일봉 집계) 같은 날짜라도 따로 둔다
+#   - 같은 날 다시 스캔하거나 겹치는 페이지를 고르면 새 봉이 없는 종목은 연산을 건너뛴다
+#   - 마지막 봉의 값과 봉 수도 함께 비교하므로 장중에 당일 봉이 바뀌면 다시 계산
+#   - 종목명/등락률/외국인 지분율은 결과에 그대로 옮기는 값이라 꺼낼 때 현재 값으로 바꾼다
+#   - 시세 저장소(prices.sqlite)에 두고 마지막 사용 시각 기준 MEMO_MAX_ROWS개만 남긴다 (LRU)
+# ─────────────────────────────────────────────
+MEMO_MAX_ROWS = 20_000
+MEMO_VERSION = 1     # 결과 행 구성이나 계산 방식이 바뀌면 올린다
+
+def _memo_params():
+    h = hashlib.sha1(repr((MEMO_VERSION, STATE_VERSION, ICHIMOKU_PERIODS, SENKOU_SHIFT, MIN_PERIOD_BARS,
+                           COLUMN_DTYPES)).encode())
+    for table in (DAILY_CLOUD_SCORE, WEEKLY_CLOUD_SCORE, MOMENTUM_SCORE):
+        h.update(table.tobytes())
+    return h.hexdigest()[:16]
+
+MEMO_PARAMS = _memo_params()
+
+def memo_key(df_price, native=None, source=DEFAULT_PRICE_SOURCE):
+    # (마지막 봉 날짜, 파라미터/소스, 마지막 봉 지문) 또는 None(시세 없음)
+    if df_price is None or df_price.empty:
+        return None
+    frames = [df_price] + [native[tf] for tf in sorted(native or {})]
+    parts = [str(len(df_price))]
+    for f in frames:
+        last = f.iloc[-1]
+        parts.append(f"{pd.Timestamp(last['날짜']):%Y-%m-%d}:" + ','.join(
+            repr(float(last[c])) for c in PRICE_COLUMNS[1:] if c in f))
+    return pd.Timestamp(df_price['날짜'].iloc[-1]).strftime('%Y-%m-%d'), f"{MEMO_PARAMS}/{source}", '|'.join(parts)
+
+def load_result_memo(code, key):
+    try:
+        con = _open_price_store()
+        try:
+            row = con.execute("SELECT bar, row FROM result_memo WHERE code = ? AND bar_date = ? AND params = ?",
+                              (code, key[0], key[1])).fetchone()
+            if row is None or row[0] != key[2]:
+                metrics.inc('result_memo_total', result='miss')
+                return None
+            with con:
+                con.execute("UPDATE result_memo SET used = ? WHERE code = ? AND bar_date = ? AND params = ?",
+                            (time.time(), code, key[0], key[1]))
+        finally:
+            con.close()
+        metrics.inc('result_memo_total', result='hit')
+        return pickle.loads(row[1])
+    except Exception:
+        return None
+
+def save_result_memo(code, key, res):
+    try:
+        con = _open_price_store()
+        try:
+            with con:
+                # 같은 종목의 예전 봉 메모는 더 쓸 일이 없다
+                con.execute("DELETE FROM result_memo WHERE code = ? AND params = ? AND bar_date < ?",
+                            (code, key[1], key[0]))
+                con.execute("INSERT OR REPLACE INTO result_memo VALUES (?, ?, ?, ?, ?, ?)",
+                            (code, key[0], key[1], key[2],
+                             pickle.dumps(res, protocol=pickle.HIGHEST_PROTOCOL), time.time()))
+        finally:
+            con.close()
+    except sqlite3.Error:
+        pass
+
+def prune_result_memo(max_rows=MEMO_MAX_ROWS):
+    try:
+        con = _open_price_store()
+        try:
+            with con:
+                con.execute("DELETE FROM result_memo WHERE rowid IN (SELECT rowid FROM result_memo "
+                            "ORDER BY used DESC LIMIT -1 OFFSET ?)", (max_rows,))
+        finally:
+            con.close()
+    except sqlite3.Error:
+        pass
+
+def rebind_result(res, row, foreign_ratio=None):
+    # 메모 결과에 현재 종목명/등락률/외국인 지분율을 넣은 행
+    return ((row[0], row[1], float(row[2])) + tuple(res[3:-1])
+            + (float(foreign_ratio) if foreign_ratio is not None else np.nan,))
+
+def _memoized(row, key, res):
+    if key is not None and res is not None:
+        save_result_memo(row[0], key, res)
+    return res
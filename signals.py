@@ -0,0 +1,315 @@
+# ─────────────────────────────────────────────
+# 신호 코드 (일목 구름대 상태 · 모멘텀 · 최종 신호)
+#   - 모든 판정은 숫자 입력에서 정수 코드로 계산하고, 표시 문자열은 화면/파일 출력 시점에만 만든다
+#   - 점수는 코드별 점수표 조회 + 배열 연산이라 결과 전체를 한 번에 계산할 수 있다
+#   - 구름대 코드는 (상태 << 4) | n봉전 으로 한 정수에 담는다 (n은 돌파/이탈일 때만 의미)
+# ─────────────────────────────────────────────
+from enum import IntEnum
+
+import numpy as np
+
+class Cloud(IntEnum):
+    NA = 0              # 주봉 지표 봉 부족 ("-")
+    NO_DATA = 1         # 주봉 52주 미만 ("데이터부족")
+    INSIDE = 2
+    ABOVE = 3
+    BELOW = 4
+    BREAKOUT = 5
+    BREAKDOWN = 6
+    RISING_ENTRY = 7
+    FALLING_ENTRY = 8
+
+class Macd(IntEnum):
+    NONE = 0
+    CROSS_UP = 1        # 히스토그램 0 상향 돌파
+    CROSS_DOWN = 2      # 히스토그램 0 하향 돌파
+    RECOVERING = 3      # 음수 구간에서 기울기 상승
+    FADING = 4          # 양수 구간에서 기울기 하락
+
+class CciEvent(IntEnum):
+    NONE = 0
+    OVERSOLD_EXIT = 1   # -100 상향 돌파
+    ZERO_CROSS = 2
+    ZERO_DEAD = 3
+    OVERBOUGHT_EXIT = 4 # +100 하향 돌파
+
+class CciZone(IntEnum):
+    # 화면 표시용 CCI 구간 (판정 순서가 점수용 CciEvent와 다름)
+    NEUTRAL = 0
+    OVERSOLD_EXIT = 1
+    ZERO_CROSS = 2
+    OVERBOUGHT_EXIT = 3
+    ZERO_DEAD = 4
+    OVERBOUGHT = 5
+    OVERSOLD = 6
+
+class MaCross(IntEnum):
+    # 이동평균선별 2비트: 5MA | 20MA << 2 | 60MA << 4
+    BELOW = 0
+    ABOVE = 1
+    GOLDEN = 2
+    DEAD = 3
+
+MA_CROSS_PERIODS = (5, 20, 60)
+
+class Signal(IntEnum):
+    WAIT = 0
+    CLOUD_CAUTION = 1
+    WEEKLY_BREAKOUT = 2
+    STRONG_BUY = 3
+    BUY_WATCH = 4
+    ENTRY_READY = 5
+    BOTTOM_SEEK = 6
+    FALL_ACCEL = 7
+    STRONG_SELL = 8
+    SELL_WATCH = 9
+    DOWNTREND = 10
+    UPTREND = 11
+    HOLD = 12
+    IN_CLOUD = 13
+
+CLOUD_SHIFT = 4
+CLOUD_N_MASK = (1 << CLOUD_SHIFT) - 1
+
+# ─────────────────────────────────────────────
+# 점수표 (코드 → 점수)
+# ─────────────────────────────────────────────
+def _table(size, values):
+    t = np.zeros(size, dtype=np.int64)
+    for k, v in values.items():
+        t[k] = v
+    return t
+
+DAILY_CLOUD_SCORE = _table(len(Cloud), {Cloud.BREAKOUT: 3, Cloud.BREAKDOWN: -3,
+                                        Cloud.RISING_ENTRY: 1, Cloud.FALLING_ENTRY: -2})
+# 주봉 돌파는 매우 강한 추세 전환 신호 → 가중치 증가
+WEEKLY_CLOUD_SCORE = _table(len(Cloud), {Cloud.BREAKOUT: 4, Cloud.BREAKDOWN: -4, Cloud.ABOVE: 2, Cloud.BELOW: -2,
+                                         Cloud.RISING_ENTRY: 1, Cloud.FALLING_ENTRY: -2})
+MACD_SCORE = _table(len(Macd), {Macd.CROSS_UP: 2, Macd.CROSS_DOWN: -2, Macd.RECOVERING: 1, Macd.FADING: -1})
+CCI_SCORE = _table(len(CciEvent), {CciEvent.OVERSOLD_EXIT: 2, CciEvent.ZERO_CROSS: 1,
+                                   CciEvent.ZERO_DEAD: -1, CciEvent.OVERBOUGHT_EXIT: -2})
+
+def _combine(m, c):
+    # 같은 방향이면 강한 쪽, 한쪽만 있으면 그 값, 엇갈리면 0
+    if m > 0 and c > 0: return max(m, c)
+    if m < 0 and c < 0: return min(m, c)
+    if c == 0: return m
+    if m == 0: return c
+    return 0
+
+# [MACD 상태, CCI 이벤트] → 통합 모멘텀 점수
+MOMENTUM_SCORE = np.array([[_combine(m, c) for c in CCI_SCORE] for m in MACD_SCORE], dtype=np.int64)
+
+IS_ABOVE = np.isin(np.arange(len(Cloud)), [Cloud.ABOVE, Cloud.BREAKOUT])
+IS_BELOW = np.isin(np.arange(len(Cloud)), [Cloud.BELOW, Cloud.BREAKDOWN])
+
+# ─────────────────────────────────────────────
+# 숫자 → 코드
+# ─────────────────────────────────────────────
+def cloud_code(state, n_ago=0):
+    return (int(state) << CLOUD_SHIFT) | int(n_ago)
+
+def cloud_parts(codes):
+    codes = np.asarray(codes, dtype=np.int64)
+    return codes >> CLOUD_SHIFT, codes & CLOUD_N_MASK
+
+def cloud_codes(close, span_a, span_b):
+    # 인자: (봉, 종목) 배열, 0행이 최신 봉. 종목별 구름대 코드 배열을 돌려준다
+    close, span_a, span_b = (np.asarray(x, dtype=np.float64) for x in (close, span_a, span_b))
+    top, bottom = np.maximum(span_a, span_b), np.minimum(span_a, span_b)
+    above_now, below_now = close[0] > top[0], close[0] < bottom[0]
+    # 돌파/이탈 시점: 과거 봉 중 가장 최근에 구름대 위(아래)가 아니었던 봉
+    not_above, not_below = close[1:] <= top[1:], close[1:] >= bottom[1:]
+    breakout_n = np.where(not_above.any(axis=0), not_above.argmax(axis=0) + 1, 0)
+    breakdown_n = np.where(not_below.any(axis=0), not_below.argmax(axis=0) + 1, 0)
+    was_above = (close[1:] > top[1:]).any(axis=0)
+    was_below = (close[1:] < bottom[1:]).any(axis=0)
+    state = np.select(
+        [above_now & (breakout_n > 0), above_now, below_now & (breakdown_n > 0), below_now,
+         was_above & ~was_below, was_below & ~was_above],
+        [Cloud.BREAKOUT, Cloud.ABOVE, Cloud.BREAKDOWN, Cloud.BELOW, Cloud.FALLING_ENTRY, Cloud.RISING_ENTRY],
+        Cloud.INSIDE)
+    n_ago = np.where(above_now, breakout_n, np.where(below_now, breakdown_n, 0))
+    return (state.astype(np.int64) << CLOUD_SHIFT) | n_ago
+
+def cloud_state(rows):
+    # rows: 최근 봉 [last, prev, ...] (종가 / senkou_a / senkou_b), 구름대 코드 1개
+    cols = [[[r[f]] for r in rows] for f in ('종가', 'senkou_a', 'senkou_b')]
+    return int(cloud_codes(*cols)[0])
+
+def cci_zone(cci_now, cci_prev):
+    if cci_prev < -100 and cci_now >= -100: return CciZone.OVERSOLD_EXIT
+    if cci_prev < 0 and cci_now >= 0: return CciZone.ZERO_CROSS
+    if cci_prev > 100 and cci_now <= 100: return CciZone.OVERBOUGHT_EXIT
+    if cci_prev > 0 and cci_now <= 0: return CciZone.ZERO_DEAD
+    if cci_now > 100: return CciZone.OVERBOUGHT
+    if cci_now < -100: return CciZone.OVERSOLD
+    return CciZone.NEUTRAL
+
+def ma_cross_code(last, prev):
+    # 최근 2봉 (종가 / 5MA / 20MA / 60MA) → 이동평균선 3개의 교차 상태를 담은 정수 1개
+    code = 0
+    for i, period in enumerate(MA_CROSS_PERIODS):
+        col = f'{period}MA'
+        if prev['종가'] <= prev[col] and last['종가'] > last[col]: state = MaCross.GOLDEN
+        elif prev['종가'] >= prev[col] and last['종가'] < last[col]: state = MaCross.DEAD
+        else: state = MaCross.ABOVE if last['종가'] > last[col] else MaCross.BELOW
+        code |= state << (2 * i)
+    return code
+
+def ma_cross_parts(code):
+    return [MaCross((int(code) >> (2 * i)) & 3) for i in range(len(MA_CROSS_PERIODS))]
+
+def macd_states(hist_now, hist_prev):
+    slope = hist_now - hist_prev
+    return np.select([(hist_now > 0) & (hist_prev <= 0), (hist_now < 0) & (hist_prev >= 0),
+                      (hist_now < 0) & (slope > 0), (hist_now > 0) & (slope < 0)],
+                     [Macd.CROSS_UP, Macd.CROSS_DOWN, Macd.RECOVERING, Macd.FADING], Macd.NONE)
+
+def cci_events(cci_now, cci_prev):
+    return np.select([(cci_prev < -100) & (cci_now >= -100), (cci_prev < 0) & (cci_now >= 0),
+                      (cci_prev > 0) & (cci_now <= 0), (cci_prev > 100) & (cci_now <= 100)],
+                     [CciEvent.OVERSOLD_EXIT, CciEvent.ZERO_CROSS, CciEvent.ZERO_DEAD, CciEvent.OVERBOUGHT_EXIT],
+                     CciEvent.NONE)
+
+def score_signals(d_cloud, w_cloud, hist_now, hist_prev, cci_now, cci_prev, close, ma20):
+    # 종목별 입력 배열 → (총점, 신호 코드, 점수 내역 dict) 배열
+    d_state, _ = cloud_parts(np.atleast_1d(d_cloud))
+    w_state, _ = cloud_parts(np.atleast_1d(w_cloud))
+    hist_now, hist_prev, cci_now, cci_prev, close, ma20 = (
+        np.atleast_1d(np.asarray(x, dtype=np.float64))
+        for x in (hist_now, hist_prev, cci_now, cci_prev, close, ma20))
+
+    s_daily = DAILY_CLOUD_SCORE[d_state]
+    s_weekly = WEEKLY_CLOUD_SCORE[w_state]
+    s_momentum = MOMENTUM_SCORE[macd_states(hist_now, hist_prev), cci_events(cci_now, cci_prev)]
+    score = s_daily + s_weekly + s_momentum
+
+    above = IS_ABOVE[d_state] | IS_ABOVE[w_state]
+    below = IS_BELOW[d_state] | IS_BELOW[w_state]
+    falling_entry = (d_state == Cloud.FALLING_ENTRY) | (w_state == Cloud.FALLING_ENTRY)
+    inside = (d_state == Cloud.INSIDE) | (w_state == Cloud.INSIDE)
+    breakout = (d_state == Cloud.BREAKOUT) | (w_state == Cloud.BREAKOUT)
+    breakdown = (d_state == Cloud.BREAKDOWN) | (w_state == Cloud.BREAKDOWN)
+    up, down = s_momentum >= 1, s_momentum <= -1
+    has_turn = breakout | breakdown | up | down
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        disparity = np.where(ma20 > 0, (close / ma20 - 1) * 100, 0.0)
+    high_disp, low_disp = disparity > 15, disparity < -10
+
+    # 위에서부터 먼저 맞는 조건이 신호 (주간 돌파 최우선 강세)
+    signal = np.select([
+        falling_entry,
+        (w_state == Cloud.BREAKOUT) & up,
+        (score >= 5) & breakout & up,
+        (score >= 3) & ~high_disp & (breakout | up),
+        (score >= 1) & (disparity <= 6) & has_turn,
+        below & up & (score >= 0),
+        below & down,
+        (score <= -5) & breakdown & down,
+        score <= -3,
+        below & low_disp,
+        above & high_disp,
+        above & ~has_turn,
+        inside,
+    ], [
+        Signal.CLOUD_CAUTION, Signal.WEEKLY_BREAKOUT, Signal.STRONG_BUY, Signal.BUY_WATCH, Signal.ENTRY_READY,
+        Signal.BOTTOM_SEEK, Signal.FALL_ACCEL, Signal.STRONG_SELL, Signal.SELL_WATCH, Signal.DOWNTREND,
+        Signal.UPTREND, Signal.HOLD, Signal.IN_CLOUD,
+    ], Signal.WAIT)
+    return score, signal.astype(np.int64), {'구름대(일)': s_daily, '구름대(주)': s_weekly, '모멘텀': s_momentum}
+
+# ─────────────────────────────────────────────
+# 신호 그룹 (상단 지표 · 필터 버튼)
+# ─────────────────────────────────────────────
+BUY_SIGNALS = frozenset({Signal.STRONG_BUY, Signal.BUY_WATCH, Signal.WEEKLY_BREAKOUT})
+
+METRIC_GROUPS = {
+    '매수계열': BUY_SIGNALS,
+    '진입준비': frozenset({Signal.ENTRY_READY, Signal.BOTTOM_SEEK}),
+    '구름대주의': frozenset({Signal.CLOUD_CAUTION}),
+    '하락계열': frozenset({Signal.FALL_ACCEL, Signal.DOWNTREND, Signal.STRONG_SELL}),
+    '매도관심↓': frozenset({Signal.SELL_WATCH, Signal.STRONG_SELL}),
+}
+
+# '전체'는 필터 없음
+FILTER_GROUPS = {
+    '매수': BUY_SIGNALS,
+    '진입준비': frozenset({Signal.ENTRY_READY}),
+    '바닥탐색': frozenset({Signal.BOTTOM_SEEK}),
+    '홀딩': frozenset({Signal.HOLD, Signal.UPTREND}),
+    '구름대주의': frozenset({Signal.CLOUD_CAUTION}),
+    '하락가속': frozenset({Signal.FALL_ACCEL, Signal.DOWNTREND}),
+    '매도': frozenset({Signal.SELL_WATCH, Signal.STRONG_SELL}),
+}
+
+def group_mask(groups):
+    # 그룹 → 신호 코드별 소속 여부 배열 (codes를 인덱스로 바로 조회)
+    return {name: np.isin(np.arange(len(Signal)), list(members)) for name, members in groups.items()}
+
+METRIC_MASKS = group_mask(METRIC_GROUPS)
+FILTER_MASKS = group_mask(FILTER_GROUPS)
+
+# ─────────────────────────────────────────────
+# 표시 문자열 (렌더링/파일 출력 시점에만)
+# ─────────────────────────────────────────────
+SIGNAL_LABELS = {
+    Signal.WAIT: "⏸️ 관망",
+    Signal.CLOUD_CAUTION: "⚠️ 구름대주의",
+    Signal.WEEKLY_BREAKOUT: "🚀 주간돌파!",
+    Signal.STRONG_BUY: "🔥 적극매수",
+    Signal.BUY_WATCH: "📈 매수관심",
+    Signal.ENTRY_READY: "🌱 진입준비",
+    Signal.BOTTOM_SEEK: "🔄 바닥탐색",
+    Signal.FALL_ACCEL: "🔻 하락가속",
+    Signal.STRONG_SELL: "🧊 적극매도",
+    Signal.SELL_WATCH: "📉 매도관심",
+    Signal.DOWNTREND: "🔽 추세하락",
+    Signal.UPTREND: "🔼 추세상승",
+    Signal.HOLD: "🛡️ 홀딩유지",
+    Signal.IN_CLOUD: "🌫️ 구름대내부",
+}
+
+CLOUD_LABELS = {
+    Cloud.NA: "-",
+    Cloud.NO_DATA: "데이터부족",
+    Cloud.INSIDE: "🌫️ 구름대 내부",
+    Cloud.ABOVE: "📈 구름대 위",
+    Cloud.BELOW: "📉 구름대 아래",
+    Cloud.BREAKOUT: "🔥 상향돌파({n}{unit}전)",
+    Cloud.BREAKDOWN: "🧊 하향이탈({n}{unit}전)",
+    Cloud.RISING_ENTRY: "🌱 구름대상승진입",
+    Cloud.FALLING_ENTRY: "⚠️ 구름대하락진입",
+}
+
+CCI_LABELS = {
+    CciZone.NEUTRAL: "➖중립",
+    CciZone.OVERSOLD_EXIT: "🟢과매도탈출",
+    CciZone.ZERO_CROSS: "🔵제로크로스",
+    CciZone.OVERBOUGHT_EXIT: "🟡과매수탈출",
+    CciZone.ZERO_DEAD: "🔴제로데드",
+    CciZone.OVERBOUGHT: "⚡과매수",
+    CciZone.OVERSOLD: "💧과매도",
+}
+
+MA_CROSS_LABELS = {MaCross.BELOW: "📉↓", MaCross.ABOVE: "📈↑", MaCross.GOLDEN: "🔥GC", MaCross.DEAD: "🧊DC"}
+
+# 결과 컬럼 → 시간 단위 (일목 구름대 코드 컬럼)
+CLOUD_COLUMNS = {'일목(일봉)': '일', '일목(주봉)': '주', '일목(월봉)': '월'}
+
+def signal_label(code):
+    return SIGNAL_LABELS[Signal(code)]
+
+def cloud_label(code, unit, labels=CLOUD_LABELS):
+    state, n = divmod(int(code), 1 << CLOUD_SHIFT)
+    return labels[Cloud(state)].format(n=n, unit=unit)
+
+def signal_counts(codes, groups=METRIC_MASKS):
+    counts = np.bincount(np.asarray(codes, dtype=np.int64), minlength=len(Signal))
+    return {name: int(counts[mask].sum()) for name, mask in groups.items()}
+
+def signal_filter(codes, f, groups=FILTER_MASKS):
+    codes = np.asarray(codes, dtype=np.int64)
+    mask = groups.get(f)
+    return np.ones(len(codes), dtype=bool) if mask is None else mask[codes]
@@ -0,0 +1,127 @@
+# ─────────────────────────────────────────────
+# 다중 시간축 봉 엔진 (일봉 → 주봉 / 월봉)
+#   - 전 종목 일봉을 한 번 이어 붙이고, 날짜 달력에서 구한 주/월 경계를 모든 종목이 공유해
+#     reduceat 한 번씩으로 집계 (resample('W') / resample('ME') + dropna와 같음)
+#   - 소스가 준 주/월봉(native)이 있으면 그 종목만 교체
+#   - 시간축별 일목 구름대 상태(n봉전 포함)를 (봉, 종목) 배열 연산으로 계산
+# ─────────────────────────────────────────────
+import numpy as np
+
+from indicators import ICHIMOKU_PERIODS, cloud_np
+from signals import Cloud, cloud_code, cloud_codes
+
+TIMEFRAMES = ('W', 'M')
+UNITS = {'D': '일', 'W': '주', 'M': '월'}
+BAR_COLUMNS = ('종가', '고가', '저가', '거래량')
+MIN_PERIOD_BARS = max(ICHIMOKU_PERIODS) + 1   # 52봉 + 진행 중 1봉 미만이면 데이터부족
+TAIL_ROWS = 5
+
+def period_keys(days, tf):
+    # days: 1970-01-01 기준 일수. 주 = 월~일, 월 = 달력 월
+    if tf == 'W':
+        return (days + 3) // 7
+    if tf == 'M':
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    raise ValueError(f"지원하지 않는 시간축: {tf}")
+
+def _concat(frames, col):
+    return np.concatenate([f[col].to_numpy(dtype=np.float64) for f in frames]) if frames else np.empty(0)
+
+def _days(frames):
+    return np.concatenate([f['날짜'].to_numpy().astype('datetime64[D]').astype(np.int64) for f in frames])
+
+def _empty_bars():
+    return {c: np.empty(0) for c in BAR_COLUMNS}
+
+def aggregate(frames, timeframes=TIMEFRAMES):
+    # frames: 종목별 일봉(날짜 오름차순) 목록 → {시간축: (이어 붙인 봉 dict, 종목별 봉 수)}
+    counts = np.array([len(f) for f in frames], dtype=np.int64)
+    if counts.sum() == 0:
+        return {tf: (_empty_bars(), np.zeros(len(frames), np.int64)) for tf in timeframes}
+    owner = np.repeat(np.arange(len(frames)), counts)
+    days = _days(frames)
+    values = {c: _concat(frames, c) for c in BAR_COLUMNS}
+    values['거래량'] = np.nan_to_num(values['거래량'])
+    # 경계는 고유 날짜(달력)에서 한 번만 계산해 전 종목이 공유
+    calendar, pos = np.unique(days, return_inverse=True)
+    new_owner = np.ones(len(days), dtype=bool)
+    new_owner[1:] = owner[1:] != owner[:-1]
+
+    out = {}
+    for tf in timeframes:
+        keys = period_keys(calendar, tf)[pos]
+        brk = new_owner.copy()
+        brk[1:] |= keys[1:] != keys[:-1]
+        starts = np.flatnonzero(brk)
+        ends = np.concatenate([starts[1:], [len(days)]]) - 1
+        bars = {
+            '종가': values['종가'][ends],
+            '고가': np.fmax.reduceat(values['고가'], starts),
+            '저가': np.fmin.reduceat(values['저가'], starts),
+            '거래량': np.add.reduceat(values['거래량'], starts),
+        }
+        keep = ~(np.isnan(bars['종가']) | np.isnan(bars['고가']) | np.isnan(bars['저가']))
+        out[tf] = ({c: v[keep] for c, v in bars.items()},
+                   np.bincount(owner[starts][keep], minlength=len(frames)))
+    return out
+
+def replace_native(bars, counts, natives):
+    # natives: 종목별 소스 봉 DataFrame 또는 None → 해당 종목의 집계 봉을 통째로 교체
+    native = [j for j, w in enumerate(natives) if w is not None and not w.empty]
+    if not native:
+        return bars, counts
+    counts = counts.copy()
+    owner = np.repeat(np.arange(len(counts)), counts)
+    keep = ~np.isin(owner, native)
+    nat_owner = np.concatenate([np.full(len(natives[j]), j) for j in native])
+    order = np.argsort(np.concatenate([owner[keep], nat_owner]), kind='stable')
+    bars = {c: np.concatenate([bars[c][keep], _concat([natives[j] for j in native], c)])[order] for c in bars}
+    for j in native:
+        counts[j] = len(natives[j])
+    return bars, counts
+
+def multi_timeframe_bars(frames, natives=None, timeframes=TIMEFRAMES):
+    # natives: 종목별 {시간축: DataFrame} 또는 None
+    out = aggregate(frames, timeframes)
+    if natives is not None:
+        for tf in timeframes:
+            out[tf] = replace_native(*out[tf], [(n or {}).get(tf) for n in natives])
+    return out
+
+def to_panel(values, counts, length=None):
+    # 이어 붙인 1-D 값(종목 순서대로)을 오른쪽 정렬 (length, N) 배열로 배치
+    n = len(counts)
+    length = max(int(counts.max()) if n else 0, 1) if length is None else length
+    out = np.full((length, n), np.nan)
+    if len(values):
+        owner = np.repeat(np.arange(n), counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        pos = np.arange(len(values)) - starts[owner]
+        out[length - counts[owner] + pos, owner] = values
+    return out
+
+def tail_index(valid, k=TAIL_ROWS):
+    # 종목별로 유효한 마지막 k개 행의 위치 (최신순) 와 유효 행 수
+    rev_cum = np.cumsum(valid[::-1], axis=0)[::-1]
+    idx = np.stack([(valid & (rev_cum == j)).argmax(axis=0) for j in range(1, k + 1)])
+    return idx, valid.sum(axis=0)
+
+def tail_cloud_codes(close, senkou_a, senkou_b, valid, k=TAIL_ROWS):
+    # (봉, 종목) 배열 → 종목별 구름대 코드 (유효 봉이 k개 미만이면 Cloud.NA)
+    idx, count = tail_index(valid, k)
+    cols = np.arange(close.shape[1])
+    codes = cloud_codes(close[idx, cols], senkou_a[idx, cols], senkou_b[idx, cols])
+    return np.where(count >= k, codes, cloud_code(Cloud.NA)), count
+
+def timeframe_clouds(bars, counts):
+    # 집계 봉 → 종목별 구름대 코드 (봉 수가 MIN_PERIOD_BARS 미만이면 Cloud.NO_DATA)
+    if not len(counts):
+        return np.empty(0, dtype=np.int64)
+    close, high, low = (to_panel(bars[c], counts) for c in ('종가', '고가', '저가'))
+    senkou_a, senkou_b = cloud_np(high, low)
+    codes, _ = tail_cloud_codes(close, senkou_a, senkou_b, ~(np.isnan(senkou_a) | np.isnan(senkou_b)))
+    return np.where(counts < MIN_PERIOD_BARS, cloud_code(Cloud.NO_DATA), codes)
+
+def frame_clouds(frames, natives=None, timeframes=TIMEFRAMES):
+    # 종목 목록 → {시간축: 종목별 구름대 코드 배열}
+    return {tf: timeframe_clouds(*tf_bars) for tf, tf_bars in multi_timeframe_bars(frames, natives, timeframes).items()}